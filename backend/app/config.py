@@ -3,24 +3,30 @@ Application configuration settings
 """
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
 
     # Groq API Configuration
-    GROQ_API_KEY: str
+    GROQ_API_KEY: str = ""  # Only needed once an AI endpoint is used
+    GROQ_BASE_URL: Optional[str] = None  # Override to point at a local stub
 
     # ElevenLabs TTS Configuration
-    ELEVENLABS_API_KEY: str
+    ELEVENLABS_API_KEY: str = ""
+    ELEVENLABS_BASE_URL: str = "https://api.elevenlabs.io"
 
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./hospital.db"
+    DB_AUTO_CREATE: bool = True  # Create missing tables at startup; disable when using migrations
     
     # Application Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
+    WORKERS: int = 0  # Production mode worker count; 0 sizes to the CPU count
+    GRACEFUL_SHUTDOWN_SECONDS: float = 30.0  # Drain deadline for in-flight requests and jobs
     
     # CORS Configuration
     ALLOWED_ORIGINS: list = [
@@ -34,11 +40,73 @@ class Settings(BaseSettings):
     STT_MODEL: str = "whisper-large-v3"
     LLM_MODEL: str = "llama-3.3-70b-versatile"
     TTS_MODEL: str = "tts-1"
+
+    # Audio Upload Configuration
+    MAX_AUDIO_UPLOAD_BYTES: int = 25 * 1024 * 1024  # Groq Whisper file limit
+    AUDIO_PREPROCESSING_ENABLED: bool = True
+    AUDIO_TARGET_SAMPLE_RATE: int = 16000
+    AUDIO_SILENCE_THRESHOLD_DB: float = -45.0
+
+    # Long Audio Transcription Configuration
+    LONG_AUDIO_MAX_UPLOAD_BYTES: int = 100 * 1024 * 1024
+    LONG_AUDIO_SEGMENT_SECONDS: float = 30.0
+    LONG_AUDIO_MAX_PARALLEL: int = 4
+
+    # Voice Session Configuration
+    VOICE_BACKEND: str = "groq"  # "groq" or "stub" for local testing
+    VOICE_STUB_LATENCY_MS: int = 50
+    VOICE_VAD_THRESHOLD_DB: float = -40.0
+    VOICE_AUDIO_CHUNK_BYTES: int = 16384
+    VOICE_DRAIN_SECONDS: float = 10.0
+
+    # Background Job Configuration
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_MAX_DEPTH: int = 100
+    JOB_STORE_PATH: str = ""  # e.g. "./jobs.db" to persist jobs in SQLite
+    JOB_MAX_WAIT_SECONDS: float = 30.0
+
+    # Admission Control Configuration (AI routes)
+    ADMISSION_MAX_CONCURRENT: int = 16
+    ADMISSION_MAX_QUEUE: int = 32
+    ADMISSION_MAX_WAIT_SECONDS: float = 10.0
+    CLIENT_RATE_PER_MINUTE: float = 30.0  # Per client IP or X-API-Key
+    CLIENT_BURST: int = 10
+
+    # Tracing Configuration
+    TRACE_SAMPLE_RATE: float = 0.1  # Fraction of requests with per-stage spans
+    TRACE_EXPORT_PATH: str = ""  # e.g. "./traces.jsonl" to write OTLP/JSON spans
+    SERVER_TIMING_ENABLED: bool = True
     
     # Appointment Configuration
     APPOINTMENT_DURATION_MINUTES: int = 30
     WORKING_HOURS_START: int = 9  # 9 AM
     WORKING_HOURS_END: int = 17   # 5 PM
+    TRIAGE_BOOKING_HORIZON_DAYS: int = 14
+
+    # Group Commit Configuration (batch concurrent appointment writes into one transaction)
+    GROUP_COMMIT_ENABLED: bool = False
+    GROUP_COMMIT_WINDOW_MS: float = 2.0
+    GROUP_COMMIT_MAX_BATCH: int = 64
+
+    # Archive Configuration (move old completed/cancelled appointments out of the live table)
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: float = 3600.0  # 0 disables the background archiver
+
+    # Response Cache Configuration
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 256
+
+    # Response Encoding Configuration
+    FAST_SERIALIZATION_ENABLED: bool = True  # orjson, no re-validation of ORM rows
+    COMPRESSION_MIN_BYTES: int = 1024  # 0 disables gzip/brotli compression
+
+    # Change Feed Configuration
+    EVENT_BUFFER_SIZE: int = 1000
+    EVENT_HEARTBEAT_SECONDS: float = 15.0
+    EVENT_SHARED_LOG: bool = False  # Fan events out across workers through the database
+    EVENT_POLL_SECONDS: float = 0.5  # How often workers pick up events from other workers
     
     class Config:
         env_file = ".env"
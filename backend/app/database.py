@@ -1,10 +1,15 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, Session
+import logging
+
 from .config import settings
 from .models import Base
+from .metrics import instrument_engine
+
+logger = logging.getLogger(__name__)
 
 
 # Create database engine
@@ -13,14 +18,81 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {},
     echo=settings.DEBUG
 )
+instrument_engine(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+    """
+    Create any missing database tables
+
+    Existing schemas are detected with a single catalog query, so worker
+    restarts against an initialized database skip create_all entirely.
+    On SQLite the appointment id sequence is also checked, see
+    _migrate_appointment_ids.
+    """
+    existing = set(inspect(engine).get_table_names())
+    missing = [table for table in Base.metadata.sorted_tables if table.name not in existing]
+    if missing:
+        Base.metadata.create_all(bind=engine, tables=missing)
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as connection:
+            _migrate_appointment_ids(connection)
+
+
+def _migrate_appointment_ids(connection):
+    """
+    Keep new appointment ids above every id ever used (SQLite)
+
+    Without AUTOINCREMENT SQLite reuses the highest ids once those rows are
+    archived, so tables created before it was enabled are rebuilt once, and
+    the id sequence is raised past the archive.
+    """
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'appointments'")
+    ).scalar()
+    if sql is None:
+        return
+    if "AUTOINCREMENT" not in sql.upper():
+        table = Base.metadata.tables["appointments"]
+        legacy = {row[1] for row in connection.execute(text("PRAGMA table_info(appointments)"))}
+        columns = ", ".join(column.name for column in table.columns if column.name in legacy)
+        connection.execute(text("ALTER TABLE appointments RENAME TO appointments_legacy"))
+        for index in table.indexes:
+            connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        table.create(connection)
+        connection.execute(text(f"INSERT INTO appointments ({columns}) SELECT {columns} FROM appointments_legacy"))
+        connection.execute(text("DROP TABLE appointments_legacy"))
+        logger.info("Rebuilt appointments table with AUTOINCREMENT ids")
+        reused = connection.execute(
+            text("SELECT COUNT(*) FROM appointments WHERE id IN (SELECT id FROM appointments_archive)")
+        ).scalar()
+        if reused:
+            logger.warning(f"{reused} appointments reuse the id of an archived appointment and will not be archived")
+
+    high_water = connection.execute(text(
+        "SELECT MAX(COALESCE((SELECT MAX(id) FROM appointments), 0), "
+        "COALESCE((SELECT MAX(id) FROM appointments_archive), 0))"
+    )).scalar()
+    connection.execute(
+        text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'appointments' AND seq < :seq"),
+        {"seq": high_water}
+    )
+    connection.execute(
+        text(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'appointments', :seq "
+            "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'appointments')"
+        ),
+        {"seq": high_water}
+    )
+
+
+def check_db():
+    """Run a trivial query; raises if the database is unreachable"""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
 
 
 def get_db() -> Session:
@@ -33,3 +105,9 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+if __name__ == "__main__":
+    # Create the schema ahead of deployment: python -m app.database
+    init_db()
+    print(f"Database ready: {settings.DATABASE_URL}")
@@ -0,0 +1,56 @@
+"""
+Process lifecycle state for readiness checks and graceful drain
+"""
+from typing import Callable, Optional
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """
+    Tracks whether this worker should receive traffic
+
+    A worker is ready once startup has finished and stops being ready as
+    soon as it begins draining (on SIGTERM or shutdown). Drain callbacks
+    let long-lived streams end early instead of holding the drain open
+    until the deadline.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.drain_started: Optional[float] = None
+        self._drain_callbacks: list[Callable[[], None]] = []
+
+    def on_drain(self, callback: Callable[[], None]):
+        """Register a callback to run when draining begins"""
+        self._drain_callbacks.append(callback)
+
+    def mark_ready(self):
+        self.ready = True
+
+    def begin_drain(self):
+        """Stop reporting ready and notify drain callbacks (idempotent)"""
+        if self.draining:
+            return
+        self.draining = True
+        self.ready = False
+        self.drain_started = time.monotonic()
+        logger.info("Draining: no longer ready for new traffic")
+        for callback in self._drain_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Drain callback failed: {e}")
+
+    def remaining(self, deadline_seconds: float) -> float:
+        """Seconds left of a drain deadline measured from when draining began"""
+        if self.drain_started is None:
+            return deadline_seconds
+        return max(0.0, deadline_seconds - (time.monotonic() - self.drain_started))
+
+
+# Global instance
+lifecycle = Lifecycle()
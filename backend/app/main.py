@@ -1,55 +1,121 @@
 """
 Hospital Appointment Assistant - Main FastAPI Application
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+import asyncio
 import logging
 
 from .config import settings
-from .database import init_db
-from .routers import appointments_router, triage_router
+from .database import init_db, check_db, SessionLocal
+from .lifecycle import lifecycle
+from .middleware import BodySizeLimitMiddleware, AdmissionControlMiddleware, CompressionMiddleware
+from .serialization import FastJSONResponse
+from .metrics import MetricsMiddleware, render_metrics, mark_worker_stopped
+from .tracing import TracingMiddleware, RequestIdFilter
+from .routers import appointments_router, triage_router, voice_router, jobs_router
+from .services import stats_service, job_queue, event_bus, appointment_writer, archive_service
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO if settings.DEBUG else logging.WARNING,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    format='%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdFilter())
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize database and services on startup, clean up on shutdown"""
+    logger.info("Starting Hospital Appointment Assistant...")
+    if settings.DB_AUTO_CREATE:
+        init_db()
+    db = SessionLocal()
+    try:
+        stats_service.ensure_initialized(db)
+    finally:
+        db.close()
+    logger.info("Database initialized successfully")
+    await job_queue.start()
+    archiver = None
+    if settings.ARCHIVE_INTERVAL_SECONDS > 0:
+        archiver = asyncio.create_task(archive_service.run_periodically(settings.ARCHIVE_INTERVAL_SECONDS))
+    poller = None
+    if settings.EVENT_SHARED_LOG:
+        poller = asyncio.create_task(event_bus.run_poller(settings.EVENT_POLL_SECONDS))
+    # Close change-feed streams when draining so they don't hold it open
+    lifecycle.on_drain(event_bus.close)
+    lifecycle.mark_ready()
+
+    yield
+
+    logger.info("Shutting down Hospital Appointment Assistant...")
+    lifecycle.begin_drain()
+    if archiver is not None:
+        archiver.cancel()
+    if poller is not None:
+        poller.cancel()
+    await job_queue.stop(timeout=lifecycle.remaining(settings.GRACEFUL_SHUTDOWN_SECONDS))
+    await asyncio.to_thread(appointment_writer.stop)
+    mark_worker_stopped()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="Hospital Appointment Assistant",
     description="AI-powered voice call system for automated patient triage and appointment scheduling",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if settings.FAST_SERIALIZATION_ENABLED else JSONResponse
 )
 
-# Configure CORS
+# Cap upload sizes before the body is spooled (multipart framing gets a little headroom)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={
+        "/api/triage/transcribe": settings.MAX_AUDIO_UPLOAD_BYTES + 64 * 1024,
+        "/api/triage/transcribe/long": settings.LONG_AUDIO_MAX_UPLOAD_BYTES + 64 * 1024
+    }
+)
+
+# Cap concurrent AI calls and rate-limit each client; emergencies skip the queue
+app.add_middleware(
+    AdmissionControlMiddleware,
+    prefixes=("/api/triage",),
+    priority_paths=("/api/triage/analyze", "/api/triage/book", "/api/triage/conversation"),
+    max_concurrent=settings.ADMISSION_MAX_CONCURRENT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait_seconds=settings.ADMISSION_MAX_WAIT_SECONDS,
+    client_rate_per_minute=settings.CLIENT_RATE_PER_MINUTE,
+    client_burst=settings.CLIENT_BURST
+)
+
+if settings.COMPRESSION_MIN_BYTES > 0:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
+app.add_middleware(MetricsMiddleware)
+
+# Just inside CORS, so the reported total covers the rest of the middleware stack
+app.add_middleware(TracingMiddleware, sample_rate=settings.TRACE_SAMPLE_RATE)
+
+# Configure CORS last so it is outermost: 413/429/503 responses from the
+# middleware above need CORS headers too, or the browser cannot read them
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing", "Retry-After"],
 )
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database and services on startup"""
-    logger.info("Starting Hospital Appointment Assistant...")
-    init_db()
-    logger.info("Database initialized successfully")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Cleanup on shutdown"""
-    logger.info("Shutting down Hospital Appointment Assistant...")
-
-
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -71,9 +137,39 @@ async def health_check():
     }
 
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness check endpoint
+
+    Unlike /health (liveness), this fails while the worker is starting up
+    or draining, and when the database is unreachable.
+    """
+    if not lifecycle.ready:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "draining" if lifecycle.draining else "starting"}
+        )
+    try:
+        await asyncio.to_thread(check_db)
+    except Exception as e:
+        logger.warning(f"Readiness check failed: {e}")
+        return JSONResponse(status_code=503, content={"status": "database unavailable"})
+    return {"status": "ready"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 # Include routers
 app.include_router(appointments_router)
 app.include_router(triage_router)
+app.include_router(voice_router)
+app.include_router(jobs_router)
 
 
 # Global exception handler
@@ -0,0 +1,164 @@
+"""
+Prometheus metrics for the Hospital Appointment Assistant
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to an empty
+directory before starting the server; each worker then writes its samples
+to memory-mapped files there and /metrics aggregates all of them.
+"""
+from contextlib import contextmanager
+import os
+import time
+import logging
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_MULTIPROCESS = bool(os.environ.get("PROMETHEUS_MULTIPROC_DIR"))
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "haa_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+HTTP_IN_FLIGHT = Gauge(
+    "haa_http_requests_in_flight",
+    "HTTP requests currently being served",
+    multiprocess_mode="livesum"
+)
+UPSTREAM_SECONDS = Histogram(
+    "haa_upstream_request_duration_seconds",
+    "Latency of calls to AI upstreams",
+    ["service", "operation"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+UPSTREAM_ERRORS = Counter(
+    "haa_upstream_errors_total",
+    "Failed calls to AI upstreams",
+    ["service", "operation"]
+)
+LLM_TOKENS = Counter(
+    "haa_llm_tokens_total",
+    "LLM tokens used",
+    ["model", "kind"]
+)
+CACHE_REQUESTS = Counter(
+    "haa_cache_requests_total",
+    "Cache lookups by result",
+    ["cache", "result"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "haa_db_query_duration_seconds",
+    "Database statement latency by statement type",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+ADMISSION_REJECTED = Counter(
+    "haa_admission_rejected_total",
+    "AI route requests refused by admission control",
+    ["reason"]
+)
+ADMISSION_WAITING = Gauge(
+    "haa_admission_waiting",
+    "AI route requests waiting for a concurrency slot",
+    multiprocess_mode="livesum"
+)
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """Time an upstream call and count it as an error if it raises"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS.labels(service, operation).inc()
+        raise
+    finally:
+        UPSTREAM_SECONDS.labels(service, operation).observe(time.perf_counter() - started)
+
+
+def record_llm_usage(model: str, usage):
+    """Count prompt/completion tokens from an LLM response's usage block"""
+    if usage is None:
+        return
+    LLM_TOKENS.labels(model, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+    LLM_TOKENS.labels(model, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def instrument_engine(engine):
+    """Record statement timings for a SQLAlchemy engine"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERY_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    """Record latency and in-flight count for every HTTP request"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; using its
+            # path template keeps label cardinality bounded
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code)
+            ).observe(time.perf_counter() - started)
+
+
+def mark_worker_stopped():
+    """Drop this worker's live gauges from the multiprocess aggregate"""
+    if _MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format"""
+    if _MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
@@ -0,0 +1,410 @@
+"""
+ASGI middleware for the Hospital Appointment Assistant
+"""
+from starlette.datastructures import MutableHeaders
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Optional
+import asyncio
+import gzip
+import heapq
+import itertools
+import json
+import math
+import time
+import logging
+
+from .metrics import ADMISSION_REJECTED, ADMISSION_WAITING
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class BodySizeLimitMiddleware:
+    """
+    Reject request bodies above a per-path size limit
+
+    Requests with a Content-Length over the limit are answered with 413
+    before any of the body is read. Chunked uploads without a length are
+    counted as they stream in and cut off as soon as they pass the limit,
+    so an oversized upload is never fully spooled.
+    """
+
+    def __init__(self, app: ASGIApp, limits: dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    def _limit_for(self, path: str):
+        """Return the body size limit for a path (longest matching prefix), or None"""
+        matches = [prefix for prefix in self.limits if path.startswith(prefix)]
+        if not matches:
+            return None
+        return self.limits[max(matches, key=len)]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                await self._reject(send, limit)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised while the body is being parsed, so FastAPI's
+                    # exception handling turns it into a 413 response
+                    logger.warning(f"Rejected streamed request body over {limit} bytes")
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Request body exceeds the {limit} byte limit"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send: Send, limit: int):
+        logger.warning(f"Rejected request body over {limit} bytes")
+        body = json.dumps({"detail": f"Request body exceeds the {limit} byte limit"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+# Phrases that mark a triage/conversation request as a likely emergency
+EMERGENCY_KEYWORDS = (
+    "chest pain", "heart attack", "can't breathe", "cannot breathe", "not breathing",
+    "difficulty breathing", "unconscious", "unresponsive", "severe bleeding", "stroke",
+    "seizure", "overdose", "suicid", "anaphyla", "choking"
+)
+
+
+class TokenBucketLimiter:
+    """Per-client token buckets: `rate` tokens per second up to `burst`"""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets: dict[str, tuple[float, float]] = {}
+
+    def take(self, key: str) -> float:
+        """
+        Take one token for a client
+
+        Returns:
+            0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+        self._buckets[key] = (tokens - 1, now)
+        if len(self._buckets) > self.max_clients:
+            self._evict(now)
+        return 0.0
+
+    def _evict(self, now: float):
+        """Forget clients whose buckets have refilled (they behave as new clients)"""
+        full_after = self.burst / self.rate
+        self._buckets = {
+            key: (tokens, updated) for key, (tokens, updated) in self._buckets.items()
+            if now - updated < full_after
+        }
+
+
+class ConcurrencyLimiter:
+    """
+    Concurrency cap with a bounded, two-lane wait queue
+
+    Waiters are served in order, priority lane first. Normal requests are
+    refused when the queue is full; priority requests are always queued.
+    Only used from one event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._hold_seconds = 1.0  # moving average of how long a slot is held
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: bool = False) -> bool:
+        """Wait for a slot; False if the queue is full or the wait times out"""
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            return True
+        if not priority and self.queued >= self.max_queue:
+            return False
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (0 if priority else 1, next(self._sequence), future))
+        ADMISSION_WAITING.inc()
+        try:
+            await asyncio.wait_for(future, timeout=self.max_wait)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            # The slot may have been handed over just as the wait ended
+            if future.done() and not future.cancelled():
+                self.release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return False
+        finally:
+            ADMISSION_WAITING.dec()
+
+    def release(self, held_seconds: Optional[float] = None):
+        """Free a slot, handing it straight to the next waiter if any"""
+        if held_seconds is not None:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(True)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Rough seconds until the current backlog clears"""
+        backlog = (self.queued + 1) * self._hold_seconds / self.max_concurrent
+        return max(1, math.ceil(backlog))
+
+
+class AdmissionControlMiddleware:
+    """
+    Admission control for AI routes
+
+    Each client (X-API-Key, otherwise IP address) has a token bucket;
+    clients over their rate get 429. Admitted requests then share a global
+    concurrency cap with a bounded wait queue. Requests whose JSON body
+    mentions emergency symptoms are queued in a priority lane ahead of
+    everyone else. When the queue is full or the wait times out, the
+    request is answered right away with 503 and a Retry-After estimate
+    instead of hanging until the upstream times out.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        prefixes: tuple,
+        max_concurrent: int,
+        max_queue: int,
+        max_wait_seconds: float,
+        client_rate_per_minute: float,
+        client_burst: int,
+        priority_paths: tuple = (),
+        peek_limit: int = 64 * 1024
+    ):
+        self.app = app
+        self.prefixes = prefixes
+        self.priority_paths = priority_paths
+        self.peek_limit = peek_limit
+        self.limiter = ConcurrencyLimiter(max_concurrent, max_queue, max_wait_seconds)
+        self.buckets = TokenBucketLimiter(client_rate_per_minute / 60, client_burst)
+
+    @staticmethod
+    def _client_key(scope: Scope) -> str:
+        for name, value in scope.get("headers", []):
+            if name == b"x-api-key" and value:
+                return "key:" + value.decode("latin-1")
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def _peek_body(self, receive: Receive) -> tuple[list, bytes]:
+        """Read up to peek_limit bytes of the body, keeping the messages for replay"""
+        messages, body = [], b""
+        while len(body) <= self.peek_limit:
+            message = await receive()
+            messages.append(message)
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        return messages, body
+
+    @staticmethod
+    def _is_emergency(body: bytes) -> bool:
+        text = body.decode("utf-8", errors="ignore").lower().replace("\u2019", "'")
+        return any(keyword in text for keyword in EMERGENCY_KEYWORDS)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Preflights cost nothing upstream, so they take no tokens or slots
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        wait = self.buckets.take(self._client_key(scope))
+        if wait:
+            ADMISSION_REJECTED.labels("client_rate").inc()
+            await self._reject(send, 429, "Too many requests from this client", math.ceil(wait))
+            return
+
+        priority = False
+        if scope["method"] == "POST" and scope["path"] in self.priority_paths:
+            buffered, body = await self._peek_body(receive)
+            priority = self._is_emergency(body)
+            original_receive = receive
+
+            async def receive() -> Message:
+                if buffered:
+                    return buffered.pop(0)
+                return await original_receive()
+
+        if not await self.limiter.acquire(priority):
+            ADMISSION_REJECTED.labels("saturated").inc()
+            await self._reject(send, 503, "Server is busy, please retry shortly", self.limiter.retry_after())
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(time.monotonic() - started)
+
+    @staticmethod
+    async def _reject(send: Send, status_code: int, detail: str, retry_after: int):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+class CompressionMiddleware:
+    """
+    Negotiated brotli/gzip compression for complete responses
+
+    Only single-message bodies of at least `minimum_size` bytes with a
+    compressible content type are compressed; streamed responses (SSE,
+    NDJSON progress) pass through untouched so they are not buffered.
+    Brotli is preferred when the client accepts it and the ``brotli``
+    package is installed. Strong ETags are weakened on compressed
+    responses since the bytes differ from the identity encoding.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    @staticmethod
+    def _negotiate(accept_encoding: str) -> Optional[str]:
+        accepted = {}
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            quality = 1.0
+            if params.strip().startswith("q="):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[token.strip().lower()] = quality
+        if brotli is not None and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = self._negotiate(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers until we know whether the body is compressed
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            compressible = (
+                not message.get("more_body", False)
+                and len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            )
+            if compressible:
+                # Large bodies are compressed off the event loop
+                if len(body) > 256 * 1024:
+                    compressed = await asyncio.to_thread(self._compress, body, encoding)
+                else:
+                    compressed = self._compress(body, encoding)
+                if len(compressed) < len(body):
+                    body = compressed
+                    headers["content-encoding"] = encoding
+                    headers["content-length"] = str(len(body))
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["etag"] = "W/" + etag
+            if headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+                headers.add_vary_header("Accept-Encoding")
+
+            await send({**start, "headers": headers.raw})
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_wrapper)
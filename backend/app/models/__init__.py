@@ -2,5 +2,8 @@
 Database models package
 """
 from .appointment import Appointment, AppointmentStatus, AppointmentType, Base
+from .appointment_stats import AppointmentStat
+from .appointment_archive import ArchivedAppointment
+from .appointment_event import AppointmentEventRecord
 
-__all__ = ["Appointment", "AppointmentStatus", "AppointmentType", "Base"]
+__all__ = ["Appointment", "AppointmentStatus", "AppointmentType", "AppointmentStat", "ArchivedAppointment", "AppointmentEventRecord", "Base"]
@@ -25,9 +25,8 @@ class AppointmentType(str, enum.Enum):
     CONSULTATION = "consultation"
 
 
-class Appointment(Base):
-    """Appointment database model"""
-    __tablename__ = "appointments"
+class AppointmentColumns:
+    """Columns shared by live and archived appointments"""
     
     id = Column(Integer, primary_key=True, index=True)
     patient_name = Column(String(255), nullable=False)
@@ -52,6 +51,13 @@ class Appointment(Base):
     livekit_room_name = Column(String(255), nullable=True)
     livekit_session_id = Column(String(255), nullable=True)
     call_duration_seconds = Column(Integer, nullable=True)
+
+
+class Appointment(AppointmentColumns, Base):
+    """Appointment database model"""
+    __tablename__ = "appointments"
+    # Never hand out the id of a deleted or archived appointment again
+    __table_args__ = {"sqlite_autoincrement": True}
     
     def __repr__(self):
         return f"<Appointment(id={self.id}, patient={self.patient_name}, date={self.appointment_date})>"
@@ -0,0 +1,22 @@
+"""
+Database model for archived appointments
+"""
+from sqlalchemy import Column, DateTime, Index
+from datetime import datetime
+from .appointment import AppointmentColumns, Base
+
+
+class ArchivedAppointment(AppointmentColumns, Base):
+    """
+    Completed or cancelled appointment moved out of the live table
+
+    Rows keep their original id, so lookups by id can fall through to the
+    archive. Only ArchiveService writes here.
+    """
+    __tablename__ = "appointments_archive"
+    __table_args__ = (Index("ix_appointments_archive_date", "appointment_date"),)
+
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<ArchivedAppointment(id={self.id}, patient={self.patient_name}, date={self.appointment_date})>"
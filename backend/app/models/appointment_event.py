@@ -0,0 +1,27 @@
+"""
+Database model for the shared appointment change feed
+"""
+from sqlalchemy import Column, DateTime, Integer, JSON, String
+from datetime import datetime
+from .appointment import Base
+
+
+class AppointmentEventRecord(Base):
+    """
+    One entry of the change feed shared by all worker processes
+
+    The autoincrement id is the event id clients see, so it is one sequence
+    across workers and never reused after old entries are pruned. Only the
+    event bus writes here.
+    """
+    __tablename__ = "appointment_events"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    type = Column(String(32), nullable=False)
+    appointment_id = Column(Integer, nullable=True)
+    data = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<AppointmentEventRecord(id={self.id}, type={self.type}, appointment={self.appointment_id})>"
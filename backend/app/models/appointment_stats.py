@@ -0,0 +1,22 @@
+"""
+Database model for precomputed appointment statistics
+"""
+from sqlalchemy import Column, Integer, String
+from .appointment import Base
+
+
+class AppointmentStat(Base):
+    """
+    Running count of appointments for one value of one dimension
+
+    Rows are kept in step with the appointments table by AppointmentService
+    in the same transaction as each write, e.g. (status, pending) -> 12.
+    """
+    __tablename__ = "appointment_stats"
+
+    dimension = Column(String(32), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<AppointmentStat({self.dimension}={self.key}: {self.count})>"
@@ -4,5 +4,7 @@ Routers package
 from .appointments import router as appointments_router
 # from .livekit import router as livekit_router  # Commented out for text chat only
 from .triage import router as triage_router
+from .voice import router as voice_router
+from .jobs import router as jobs_router
 
-__all__ = ["appointments_router", "triage_router"]
+__all__ = ["appointments_router", "triage_router", "voice_router", "jobs_router"]
@@ -1,10 +1,12 @@
 """
 API routes for appointment management
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import datetime, date
 
 from ..database import get_db
 from ..models import AppointmentStatus
@@ -13,12 +15,58 @@ from ..schemas import (
     AppointmentUpdate,
     AppointmentResponse,
     AvailableSlotsRequest,
-    AvailableSlotsResponse
+    AvailableSlotsResponse,
+    AppointmentStatsResponse,
+    BulkRescheduleRequest,
+    BulkRescheduleResponse
 )
-from ..services import appointment_service
+from ..config import settings
+from ..services import (
+    appointment_service,
+    appointment_writer,
+    reschedule_service,
+    response_cache,
+    event_bus,
+    stats_service
+)
+from ..services.response_cache import CachedResponse
+from ..serialization import dumps, appointment_row, dump_appointments
 
 router = APIRouter(prefix="/api/appointments", tags=["appointments"])
 
+_appointment_adapter = TypeAdapter(AppointmentResponse)
+_appointment_list_adapter = TypeAdapter(List[AppointmentResponse])
+
+
+def _encode_appointments(appointments) -> bytes:
+    """Encode appointment rows, skipping model validation in fast serialization mode"""
+    if settings.FAST_SERIALIZATION_ENABLED:
+        return dump_appointments(appointments)
+    return _appointment_list_adapter.dump_json(
+        _appointment_list_adapter.validate_python(appointments, from_attributes=True)
+    )
+
+
+def _encode_appointment(appointment) -> bytes:
+    if settings.FAST_SERIALIZATION_ENABLED:
+        return dumps(appointment_row(appointment))
+    return _appointment_adapter.dump_json(
+        _appointment_adapter.validate_python(appointment, from_attributes=True)
+    )
+
+
+def _cached_json_response(request: Request, entry: CachedResponse) -> Response:
+    """Build a JSON response with ETag, or a bodyless 304 if the client copy is current"""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # Weak comparison: compressed responses carry a W/ version of the ETag
+        client_etags = [tag.strip() for tag in if_none_match.split(",")]
+        client_etags = [tag[2:] if tag.startswith("W/") else tag for tag in client_etags]
+        if entry.etag in client_etags or "*" in client_etags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
 
 @router.post("", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED)
 async def create_appointment(
@@ -28,6 +76,8 @@ async def create_appointment(
     """Create a new appointment"""
     try:
         appointment_dict = appointment.model_dump()
+        if settings.GROUP_COMMIT_ENABLED:
+            return await appointment_writer.create(appointment_dict)
         created_appointment = appointment_service.create_appointment(db, appointment_dict)
         return created_appointment
     except Exception as e:
@@ -39,29 +89,119 @@ async def create_appointment(
 
 @router.get("", response_model=List[AppointmentResponse])
 async def list_appointments(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     status: Optional[AppointmentStatus] = None,
+    include_archived: bool = False,
+    db: Session = Depends(get_db)
+):
+    """List all appointments with optional filtering; archived ones only on request"""
+    cache_key = f"list:{skip}:{limit}:{status.value if status else ''}:{int(include_archived)}"
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        generation = response_cache.generation
+        appointments = appointment_service.get_appointments(db, skip, limit, status, include_archived)
+        body = _encode_appointments(appointments)
+        entry = response_cache.put(cache_key, body, generation)
+    return _cached_json_response(request, entry)
+
+
+@router.get("/stats", response_model=AppointmentStatsResponse)
+async def get_appointment_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
     db: Session = Depends(get_db)
 ):
-    """List all appointments with optional filtering"""
-    appointments = appointment_service.get_appointments(db, skip, limit, status)
-    return appointments
+    """Get appointment counts by status, type, department and day"""
+    return stats_service.get_stats(db, start_date, end_date)
+
+
+@router.post("/stats/rebuild", response_model=AppointmentStatsResponse)
+async def rebuild_appointment_stats(db: Session = Depends(get_db)):
+    """Recompute statistics from the appointments table to repair drift"""
+    try:
+        stats_service.rebuild(db)
+        return stats_service.get_stats(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to rebuild statistics: {str(e)}"
+        )
+
+
+@router.post("/bulk-reschedule", response_model=BulkRescheduleResponse)
+async def bulk_reschedule(
+    request: BulkRescheduleRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Move every active appointment of an absent doctor or closed department
+
+    Computes the reassignment in one pass (EMERGENCY first) and applies it
+    in a single transaction; with ``dry_run`` only the plan is returned.
+    """
+    try:
+        return reschedule_service.bulk_reschedule(
+            db,
+            request.date,
+            doctor_name=request.doctor_name,
+            department=request.department,
+            horizon_days=request.horizon_days,
+            replacement_doctor=request.replacement_doctor,
+            dry_run=request.dry_run
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to reschedule appointments: {str(e)}"
+        )
+
+
+@router.get("/events")
+async def stream_appointment_events(
+    last_event_id: Optional[int] = Header(default=None),
+    since: Optional[int] = None
+):
+    """
+    Server-Sent Events feed of appointment create/update/cancel/reschedule events
+
+    Clients resume from the last event they saw via the ``Last-Event-ID``
+    header (sent automatically by EventSource on reconnect) or ``since``.
+    """
+    resume_from = last_event_id if last_event_id is not None else since
+    return StreamingResponse(
+        event_bus.stream(resume_from, heartbeat_seconds=settings.EVENT_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/{appointment_id}", response_model=AppointmentResponse)
 async def get_appointment(
     appointment_id: int,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    """Get a specific appointment by ID"""
-    appointment = appointment_service.get_appointment(db, appointment_id)
-    if not appointment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Appointment {appointment_id} not found"
-        )
-    return appointment
+    """Get a specific appointment by ID (archived appointments included)"""
+    cache_key = f"get:{appointment_id}"
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        generation = response_cache.generation
+        appointment = appointment_service.get_appointment(db, appointment_id)
+        if not appointment:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Appointment {appointment_id} not found"
+            )
+        body = _encode_appointment(appointment)
+        entry = response_cache.put(cache_key, body, generation)
+    return _cached_json_response(request, entry)
 
 
 @router.put("/{appointment_id}", response_model=AppointmentResponse)
@@ -73,6 +213,8 @@ async def update_appointment(
     """Update an existing appointment"""
     try:
         update_data = appointment_update.model_dump(exclude_unset=True)
+        if settings.GROUP_COMMIT_ENABLED:
+            return await appointment_writer.update(appointment_id, update_data)
         updated_appointment = appointment_service.update_appointment(
             db, appointment_id, update_data
         )
@@ -96,7 +238,10 @@ async def cancel_appointment(
 ):
     """Cancel an appointment"""
     try:
-        appointment_service.cancel_appointment(db, appointment_id)
+        if settings.GROUP_COMMIT_ENABLED:
+            await appointment_writer.update(appointment_id, {"status": AppointmentStatus.CANCELLED})
+        else:
+            appointment_service.cancel_appointment(db, appointment_id)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -119,7 +264,8 @@ async def get_available_slots(
         slots = appointment_service.get_available_slots(
             db,
             request.date,
-            request.duration_minutes
+            request.duration_minutes,
+            request.department
         )
         return AvailableSlotsResponse(
             date=request.date,
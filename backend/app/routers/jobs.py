@@ -0,0 +1,41 @@
+"""
+API routes for background job results
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+from ..config import settings
+from ..services import job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """Queue depth, worker utilization and job counts"""
+    return job_queue.stats()
+
+
+@router.get("/{job_id}")
+async def get_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, description="Seconds to wait for the job to finish (long-poll)")
+):
+    """Get a job's status and, once finished, its result"""
+    job = await job_queue.wait(job_id, min(wait, settings.JOB_MAX_WAIT_SECONDS))
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return job.to_dict()
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found"
+        )
+    return job.to_dict()
@@ -1,14 +1,31 @@
 """
 API routes for AI-powered symptom triage
 """
-from fastapi import APIRouter, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from ..schemas import (
     TriageRequest,
     TriageResponse,
     ConversationRequest,
-    ConversationResponse
+    ConversationResponse,
+    TriageBookingRequest,
+    TriageBookingResponse
 )
-from ..services import groq_service
+from ..config import settings
+from ..database import get_db
+from ..services import groq_service, audio_preprocessor, long_audio_transcriber, job_queue, intake_service
+from ..services.job_queue import JobQueueFull
+from ..tracing import span
+from ..serialization import FastJSONResponse
+from typing import Optional
+import asyncio
+import base64
+import json
+import os
+import shutil
+import tempfile
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,21 +33,44 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/triage", tags=["triage"])
 
 
+def _submit_job(kind: str, payload: dict) -> JSONResponse:
+    """Queue a background job and answer 202 with its id"""
+    try:
+        job = job_queue.submit(kind, payload)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"job_id": job.id, "status": job.status, "result_url": f"/api/jobs/{job.id}"}
+    )
+
+
+async def _run_triage(symptoms: str) -> dict:
+    """Triage symptoms and shape the result like TriageResponse"""
+    result = await groq_service.triage_symptoms(symptoms)
+    return TriageResponse(
+        severity=result["severity"],
+        advice=result["advice"],
+        needs_appointment=result["needs_appointment"],
+        urgency=result["urgency"],
+        department=result["department"]
+    ).model_dump()
+
+
 @router.post("/analyze", response_model=TriageResponse)
-async def analyze_symptoms(request: TriageRequest):
+async def analyze_symptoms(request: TriageRequest, background: bool = False):
     """
     Analyze patient symptoms and provide triage recommendation
+
+    With ``background=true`` the work is queued and a job id is returned
+    immediately; poll ``/api/jobs/{job_id}`` for the result.
     """
+    if background:
+        return _submit_job("triage", {"symptoms": request.symptoms})
     try:
-        result = await groq_service.triage_symptoms(request.symptoms)
-        
-        return TriageResponse(
-            severity=result["severity"],
-            advice=result["advice"],
-            needs_appointment=result["needs_appointment"],
-            urgency=result["urgency"],
-            department=result["department"]
-        )
+        result = await _run_triage(request.symptoms)
+        with span("serialize"):
+            return FastJSONResponse(content=result)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -38,38 +78,67 @@ async def analyze_symptoms(request: TriageRequest):
         )
 
 
+async def _run_conversation(messages: list[dict], enable_tts: bool) -> dict:
+    """Generate the assistant reply (and optional speech) for a conversation"""
+    response_text = await groq_service.generate_conversation_response(messages)
+
+    # Generate audio if TTS is enabled
+    audio_data = None
+    if enable_tts:
+        try:
+            audio_bytes = await groq_service.generate_speech(response_text)
+            logger.info(f"Audio bytes type: {type(audio_bytes)}, length: {len(audio_bytes) if audio_bytes else 0}")
+            # Convert to base64 for JSON response
+            with span("base64", bytes=len(audio_bytes)):
+                audio_data = base64.b64encode(audio_bytes).decode('utf-8')
+            logger.info(f"Base64 audio data length: {len(audio_data)}")
+        except Exception as e:
+            logger.warning(f"TTS failed, continuing without audio: {e}")
+
+    return {
+        "response": response_text,
+        "message_count": len(messages) + 1,
+        "audio_data": audio_data
+    }
+
+
+@router.post("/book", response_model=TriageBookingResponse)
+async def triage_and_book(request: TriageBookingRequest, db: Session = Depends(get_db)):
+    """
+    Triage symptoms and book the earliest suitable appointment in one call
+
+    Replaces the analyze -> available-slots -> create sequence. The triage
+    result is stored on the appointment (triage_notes, ai_recommendation).
+    """
+    try:
+        return await intake_service.triage_and_book(db, request.model_dump())
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to triage and book: {str(e)}"
+        )
+
+
 @router.post("/conversation")
-async def handle_conversation(request: ConversationRequest):
+async def handle_conversation(request: ConversationRequest, background: bool = False):
     """
     Handle conversational interaction with the AI assistant
+
+    With ``background=true`` the work is queued and a job id is returned
+    immediately; poll ``/api/jobs/{job_id}`` for the result.
     """
+    # Convert Pydantic models to dictionaries
+    messages = [
+        {"role": msg.role, "content": msg.content}
+        for msg in request.messages
+    ]
+    if background:
+        return _submit_job("conversation", {"messages": messages, "enable_tts": request.enable_tts})
     try:
-        # Convert Pydantic models to dictionaries
-        messages = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.messages
-        ]
-        
-        response_text = await groq_service.generate_conversation_response(messages)
-        
-        # Generate audio if TTS is enabled
-        audio_data = None
-        if request.enable_tts:
-            try:
-                audio_bytes = await groq_service.generate_speech(response_text)
-                logger.info(f"Audio bytes type: {type(audio_bytes)}, length: {len(audio_bytes) if audio_bytes else 0}")
-                # Convert to base64 for JSON response
-                import base64
-                audio_data = base64.b64encode(audio_bytes).decode('utf-8')
-                logger.info(f"Base64 audio data length: {len(audio_data)}")
-            except Exception as e:
-                logger.warning(f"TTS failed, continuing without audio: {e}")
-        
-        return {
-            "response": response_text,
-            "message_count": len(messages) + 1,
-            "audio_data": audio_data
-        }
+        result = await _run_conversation(messages, request.enable_tts)
+        # Render here rather than in FastAPI so encoding shows up as its own stage
+        with span("serialize"):
+            return FastJSONResponse(content=result)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -77,37 +146,176 @@ async def handle_conversation(request: ConversationRequest):
         )
 
 
+def _is_wav(content_type: Optional[str], filename: Optional[str]) -> bool:
+    """Check whether an upload looks like a WAV file"""
+    return "wav" in (content_type or "").lower() or (filename or "").lower().endswith(".wav")
+
+
+async def _run_transcription(fileobj, filename: Optional[str], content_type: Optional[str]) -> dict:
+    """Preprocess (if WAV) and transcribe an audio file object"""
+    stt_file = (filename or "audio.wav", fileobj)
+
+    # Downmix/resample/trim WAV uploads before sending them upstream
+    preprocessing = None
+    processed_file = None
+    if settings.AUDIO_PREPROCESSING_ENABLED and _is_wav(content_type, filename):
+        processed = await asyncio.to_thread(audio_preprocessor.process_file, fileobj)
+        if processed is not None:
+            processed_file, result = processed
+            stt_file = (filename or "audio.wav", processed_file)
+            preprocessing = result.to_dict()
+
+    # Transcribe using Groq
+    try:
+        transcription = await groq_service.transcribe_audio(stt_file)
+    finally:
+        if processed_file is not None:
+            processed_file.close()
+
+    return {
+        "transcription": transcription,
+        "filename": filename,
+        "content_type": content_type,
+        "preprocessing": preprocessing
+    }
+
+
 @router.post("/transcribe")
-async def transcribe_audio(audio_file: UploadFile = File(...)):
+async def transcribe_audio(audio_file: UploadFile = File(...), background: bool = False):
     """
     Transcribe audio file to text using Groq STT
+
+    The upload is already spooled to a temporary file by the multipart
+    parser (in memory only while small), so it is handed to the STT client
+    as-is instead of being read into a second buffer. With
+    ``background=true`` the file is kept on disk and a job id is returned.
     """
     try:
         # Validate file type
-        if not audio_file.content_type.startswith('audio/'):
+        if not (audio_file.content_type or "").startswith('audio/'):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File must be an audio file"
             )
 
-        # Read audio file
-        audio_data = await audio_file.read()
-
-        # Create a temporary file-like object
-        from io import BytesIO
-        audio_buffer = BytesIO(audio_data)
-        audio_buffer.name = audio_file.filename or "audio.wav"
+        # Enforce the size limit without reading the file
+        audio_file.file.seek(0, 2)
+        size = audio_file.file.tell()
+        audio_file.file.seek(0)
+        if size > settings.MAX_AUDIO_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Audio file exceeds the {settings.MAX_AUDIO_UPLOAD_BYTES} byte limit"
+            )
 
-        # Transcribe using Groq
-        transcription = await groq_service.transcribe_audio(audio_buffer)
+        if background:
+            saved = tempfile.NamedTemporaryFile(prefix="transcribe_", delete=False)
+            try:
+                # Chunked copy off the event loop, like /transcribe/long
+                with saved:
+                    await asyncio.to_thread(shutil.copyfileobj, audio_file.file, saved)
+                return _submit_job("transcription", {
+                    "path": saved.name,
+                    "filename": audio_file.filename,
+                    "content_type": audio_file.content_type
+                })
+            except Exception:
+                _remove_file(saved.name)
+                raise
 
-        return {
-            "transcription": transcription,
-            "filename": audio_file.filename,
-            "content_type": audio_file.content_type
-        }
+        return await _run_transcription(audio_file.file, audio_file.filename, audio_file.content_type)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to transcribe audio: {str(e)}"
         )
+    finally:
+        await audio_file.close()
+
+
+@router.post("/transcribe/long")
+async def transcribe_long_audio(audio_file: UploadFile = File(...)):
+    """
+    Transcribe a long recording in parallel segments
+
+    Streams newline-delimited JSON progress events: ``started``, one
+    ``segment`` per finished segment (in completion order) and a final
+    ``complete`` event with the stitched transcription. Only PCM WAV is
+    split; other formats must fit MAX_AUDIO_UPLOAD_BYTES.
+    """
+    if not (audio_file.content_type or "").startswith('audio/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="File must be an audio file"
+        )
+
+    # Enforce the size limit without reading the file
+    audio_file.file.seek(0, 2)
+    size = audio_file.file.tell()
+    audio_file.file.seek(0)
+    if size > settings.LONG_AUDIO_MAX_UPLOAD_BYTES:
+        await audio_file.close()
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Audio file exceeds the {settings.LONG_AUDIO_MAX_UPLOAD_BYTES} byte limit"
+        )
+    if size > settings.MAX_AUDIO_UPLOAD_BYTES:
+        # Only WAV is split into segments; anything else goes upstream in one request
+        is_wav = long_audio_transcriber.wav_info(audio_file.file) is not None
+        audio_file.file.seek(0)
+        if not is_wav:
+            await audio_file.close()
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=(
+                    f"Only PCM WAV recordings can be split; other formats are limited to "
+                    f"{settings.MAX_AUDIO_UPLOAD_BYTES} bytes"
+                )
+            )
+
+    # The spooled upload is closed once this handler returns, before the
+    # response streams, so move it to a file the stream owns (chunked copy)
+    filename = audio_file.filename or "audio.wav"
+    try:
+        with tempfile.NamedTemporaryFile(prefix="long_", delete=False) as saved:
+            await asyncio.to_thread(shutil.copyfileobj, audio_file.file, saved)
+    finally:
+        await audio_file.close()
+
+    async def progress():
+        try:
+            async for event in long_audio_transcriber.transcribe_stream(saved.name, filename):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            logger.error(f"Error transcribing long audio: {e}")
+            yield json.dumps({"type": "error", "detail": f"Failed to transcribe audio: {str(e)}"}) + "\n"
+
+    # Runs after the stream ends, also when the client disconnects
+    return StreamingResponse(
+        progress(),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(_remove_file, saved.name)
+    )
+
+
+def _remove_file(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def _transcription_job(payload: dict) -> dict:
+    """Background handler: transcribe a saved upload, then delete it"""
+    try:
+        with open(payload["path"], "rb") as audio:
+            return await _run_transcription(audio, payload["filename"], payload["content_type"])
+    finally:
+        _remove_file(payload["path"])
+
+
+job_queue.register("triage", lambda payload: _run_triage(payload["symptoms"]))
+job_queue.register("conversation", lambda payload: _run_conversation(payload["messages"], payload["enable_tts"]))
+job_queue.register("transcription", _transcription_job, cleanup=lambda payload: _remove_file(payload["path"]))
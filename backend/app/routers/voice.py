@@ -0,0 +1,49 @@
+"""
+WebSocket routes for real-time voice sessions
+"""
+from fastapi import APIRouter, WebSocket, Query
+from typing import Optional
+from ..services.agent_dispatcher import agent_dispatcher
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/voice", tags=["voice"])
+
+
+@router.websocket("/session")
+async def voice_session(
+    websocket: WebSocket,
+    sample_rate: int = Query(default=16000, ge=8000, le=48000),
+    appointment_id: Optional[int] = None
+):
+    """
+    Duplex voice session
+
+    The client streams 16-bit little-endian mono PCM as binary frames and
+    may send JSON control messages (``{"type": "stop"}``,
+    ``{"type": "interrupt"}``). The server sends JSON events
+    (``session_started``, ``speech_start``, ``transcript``, ``response_text``,
+    ``response_audio_start``, ``response_end``, ``barge_in``) and reply
+    audio as binary frames.
+    """
+    await websocket.accept()
+    session = await agent_dispatcher.run_session(websocket, sample_rate, appointment_id)
+    logger.info(f"Voice session {session.session_id} closed")
+
+
+@router.get("/sessions")
+async def list_voice_sessions():
+    """List voice sessions in progress"""
+    return {
+        "backend": agent_dispatcher.backend,
+        "active_sessions": [
+            {
+                "session_id": session.session_id,
+                "appointment_id": session.appointment_id,
+                "duration_seconds": session.duration_seconds,
+                "messages": len(session.history)
+            }
+            for session in agent_dispatcher.active_sessions.values()
+        ]
+    }
@@ -6,13 +6,18 @@ from .appointment import (
     AppointmentUpdate,
     AppointmentResponse,
     AvailableSlotsRequest,
-    AvailableSlotsResponse
+    AvailableSlotsResponse,
+    AppointmentStatsResponse,
+    BulkRescheduleRequest,
+    BulkRescheduleResponse
 )
 from .triage import (
     TriageRequest,
     TriageResponse,
     ConversationRequest,
-    ConversationResponse
+    ConversationResponse,
+    TriageBookingRequest,
+    TriageBookingResponse
 )
 
 __all__ = [
@@ -21,8 +26,13 @@ __all__ = [
     "AppointmentResponse",
     "AvailableSlotsRequest",
     "AvailableSlotsResponse",
+    "AppointmentStatsResponse",
+    "BulkRescheduleRequest",
+    "BulkRescheduleResponse",
     "TriageRequest",
     "TriageResponse",
     "ConversationRequest",
-    "ConversationResponse"
+    "ConversationResponse",
+    "TriageBookingRequest",
+    "TriageBookingResponse"
 ]
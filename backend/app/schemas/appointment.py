@@ -1,7 +1,7 @@
 """
 Pydantic schemas for appointments
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from datetime import datetime
 from typing import Optional
 from ..models import AppointmentStatus, AppointmentType
@@ -57,6 +57,7 @@ class AvailableSlotsRequest(BaseModel):
     """Schema for requesting available slots"""
     date: datetime
     duration_minutes: int = Field(default=30, ge=15, le=120)
+    department: Optional[str] = None
 
 
 class AvailableSlotsResponse(BaseModel):
@@ -64,3 +65,60 @@ class AvailableSlotsResponse(BaseModel):
     date: datetime
     available_slots: list[datetime]
     total_slots: int
+
+
+class AppointmentStatsResponse(BaseModel):
+    """Schema for appointment statistics response"""
+    total: int
+    by_status: dict[str, int]
+    by_type: dict[str, int]
+    by_department: dict[str, int]
+    by_day: dict[str, int]
+
+
+class BulkRescheduleRequest(BaseModel):
+    """Schema for moving all appointments of an absent doctor or closed department"""
+    date: datetime
+    doctor_name: Optional[str] = None
+    department: Optional[str] = None
+    horizon_days: int = Field(default=7, ge=1, le=60)
+    replacement_doctor: Optional[str] = None
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def require_target(self):
+        if not self.doctor_name and not self.department:
+            raise ValueError("doctor_name or department is required")
+        return self
+
+
+class RescheduleMove(BaseModel):
+    """One appointment moved by a bulk reschedule"""
+    appointment_id: int
+    patient_name: str
+    appointment_type: AppointmentType
+    department: Optional[str] = None
+    from_date: datetime
+    to_date: datetime
+    from_doctor: Optional[str] = None
+    to_doctor: Optional[str] = None
+
+
+class RescheduleUnassigned(BaseModel):
+    """An affected appointment for which no free slot was found"""
+    appointment_id: int
+    patient_name: str
+    appointment_type: AppointmentType
+    department: Optional[str] = None
+    appointment_date: datetime
+
+
+class BulkRescheduleResponse(BaseModel):
+    """Schema for the result of a bulk reschedule"""
+    date: datetime
+    doctor_name: Optional[str] = None
+    department: Optional[str] = None
+    dry_run: bool
+    affected: int
+    moved: list[RescheduleMove]
+    unassigned: list[RescheduleUnassigned]
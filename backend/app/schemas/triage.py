@@ -1,8 +1,10 @@
 """
 Pydantic schemas for symptom triage
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
 from typing import Literal, Optional
+from .appointment import AppointmentResponse
 
 
 class TriageRequest(BaseModel):
@@ -38,3 +40,20 @@ class ConversationResponse(BaseModel):
     response: str
     message_count: int
     audio_data: Optional[bytes] = None
+
+
+class TriageBookingRequest(BaseModel):
+    """Schema for triaging symptoms and booking in one request"""
+    symptoms: str
+    patient_name: str = Field(..., min_length=1, max_length=255)
+    patient_phone: str = Field(..., min_length=10, max_length=20)
+    patient_email: Optional[EmailStr] = None
+    earliest_date: Optional[datetime] = None
+
+
+class TriageBookingResponse(BaseModel):
+    """Schema for triage-and-book response"""
+    triage: TriageResponse
+    booked: bool
+    appointment: Optional[AppointmentResponse] = None
+    message: str
@@ -0,0 +1,56 @@
+"""
+Fast JSON encoding for API responses
+
+orjson is used when installed; otherwise the stdlib encoder with compact
+separators. Appointment rows loaded by the service are already valid, so
+they are turned into response dicts directly instead of being validated
+again through AppointmentResponse.
+"""
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Iterable
+import json
+
+from fastapi.responses import JSONResponse
+
+from .schemas import AppointmentResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Same fields, in the same order, as AppointmentResponse produces
+APPOINTMENT_FIELDS = tuple(AppointmentResponse.model_fields)
+
+
+def _default(value: Any):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when available"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def appointment_row(appointment) -> dict:
+    """Response dict for an appointment loaded from the database, without re-validation"""
+    return {name: getattr(appointment, name) for name in APPOINTMENT_FIELDS}
+
+
+def dump_appointments(appointments: Iterable) -> bytes:
+    """Encode a list of appointment rows as a JSON array"""
+    return dumps([appointment_row(appointment) for appointment in appointments])
@@ -0,0 +1,55 @@
+"""
+Uvicorn server and supervisor with graceful drain for production mode
+"""
+import time
+import logging
+
+from uvicorn import Server
+from uvicorn.supervisors import Multiprocess
+
+from .lifecycle import lifecycle
+
+logger = logging.getLogger(__name__)
+
+
+class DrainingServer(Server):
+    """
+    Uvicorn server that flips readiness off as soon as a stop signal arrives
+
+    Uvicorn then stops accepting connections and waits up to
+    ``timeout_graceful_shutdown`` for in-flight requests before running the
+    lifespan shutdown.
+    """
+
+    def handle_exit(self, sig, frame):
+        lifecycle.begin_drain()
+        super().handle_exit(sig, frame)
+
+
+class DrainingMultiprocess(Multiprocess):
+    """
+    Worker supervisor that drains all workers in parallel
+
+    The stock supervisor terminates and joins workers one at a time, so
+    the total drain could take one deadline per worker while the others
+    keep accepting requests. Here every worker is signalled at once and any
+    still alive after the deadline is killed.
+    """
+
+    def __init__(self, config, target, sockets, deadline_seconds: float):
+        super().__init__(config, target=target, sockets=sockets)
+        self.deadline_seconds = deadline_seconds
+
+    def shutdown(self):
+        for process in self.processes:
+            process.terminate()
+
+        deadline = time.monotonic() + self.deadline_seconds
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning(f"Worker {process.pid} did not drain in time, killing it")
+                process.kill()
+                process.join()
+
+        logger.info(f"Stopped {len(self.processes)} workers")
@@ -4,5 +4,28 @@ Services package
 from .groq_service import groq_service
 # from .livekit_service import livekit_service  # Commented out for text chat only
 from .appointment_service import appointment_service
+from .response_cache import response_cache
+from .event_bus import event_bus
+from .stats_service import stats_service
+from .audio_preprocessing import audio_preprocessor
+from .long_transcription import long_audio_transcriber
+from .job_queue import job_queue
+from .intake_service import intake_service
+from .group_commit import appointment_writer
+from .reschedule_service import reschedule_service
+from .archive_service import archive_service
 
-__all__ = ["groq_service", "appointment_service"]
+__all__ = [
+    "groq_service",
+    "appointment_service",
+    "response_cache",
+    "event_bus",
+    "stats_service",
+    "audio_preprocessor",
+    "long_audio_transcriber",
+    "job_queue",
+    "intake_service",
+    "appointment_writer",
+    "reschedule_service",
+    "archive_service"
+]
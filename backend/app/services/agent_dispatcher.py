@@ -0,0 +1,417 @@
+"""
+Real-time voice session engine
+
+Runs a duplex voice conversation over a WebSocket: streamed PCM in, voice
+activity detection, per-utterance STT, LLM and TTS as an asyncio pipeline,
+with barge-in (the caller speaking cancels the reply in progress).
+"""
+from collections import deque
+from typing import Optional, Protocol
+import asyncio
+import io
+import json
+import time
+import uuid
+import wave
+import logging
+
+import numpy as np
+from fastapi import WebSocket, WebSocketDisconnect
+
+from ..config import settings
+from ..database import SessionLocal
+from .appointment_service import appointment_service
+from .groq_service import groq_service
+
+logger = logging.getLogger(__name__)
+
+_FRAME_MS = 20
+
+
+class SpeechToText(Protocol):
+    """Turns one utterance of 16-bit mono PCM into text"""
+
+    async def transcribe(self, pcm: bytes, sample_rate: int) -> str: ...
+
+
+class LanguageModel(Protocol):
+    """Produces the assistant's next reply from the conversation so far"""
+
+    async def respond(self, history: list[dict]) -> str: ...
+
+
+class TextToSpeech(Protocol):
+    """Turns reply text into audio bytes of `audio_format`"""
+    audio_format: str
+
+    async def synthesize(self, text: str) -> bytes: ...
+
+
+class GroqSpeechToText:
+    """STT backed by Groq Whisper (one request per utterance)"""
+
+    async def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(pcm)
+        buffer.seek(0)
+        result = await groq_service.transcribe_audio(("utterance.wav", buffer))
+        return str(getattr(result, "text", result)).strip()
+
+
+class GroqLanguageModel:
+    """LLM backed by the receptionist conversation prompt"""
+
+    async def respond(self, history: list[dict]) -> str:
+        return await groq_service.generate_conversation_response(history)
+
+
+class ElevenLabsTextToSpeech:
+    """TTS backed by ElevenLabs (MP3 output)"""
+    audio_format = "audio/mpeg"
+
+    async def synthesize(self, text: str) -> bytes:
+        return await groq_service.generate_speech(text)
+
+
+class StubSpeechToText:
+    """Local STT stand-in: reports utterance length after a fixed delay"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+
+    async def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        await asyncio.sleep(self.latency)
+        self.calls += 1
+        return f"utterance {self.calls} ({len(pcm) / 2 / sample_rate:.2f}s)"
+
+
+class StubLanguageModel:
+    """Local LLM stand-in: echoes the last user message"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+
+    async def respond(self, history: list[dict]) -> str:
+        await asyncio.sleep(self.latency)
+        last_user = next((m["content"] for m in reversed(history) if m["role"] == "user"), "")
+        return f"You said: {last_user}"
+
+
+class StubTextToSpeech:
+    """Local TTS stand-in: 16kHz PCM silence, 60ms per character"""
+    audio_format = "audio/pcm;rate=16000"
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+
+    async def synthesize(self, text: str) -> bytes:
+        await asyncio.sleep(self.latency)
+        return bytes(2 * 16000 * 60 // 1000 * len(text))
+
+
+def build_backends(name: str) -> tuple[SpeechToText, LanguageModel, TextToSpeech]:
+    """Create the STT/LLM/TTS backends for a VOICE_BACKEND setting"""
+    if name == "stub":
+        latency = settings.VOICE_STUB_LATENCY_MS / 1000
+        return StubSpeechToText(latency), StubLanguageModel(latency), StubTextToSpeech(latency)
+    return GroqSpeechToText(), GroqLanguageModel(), ElevenLabsTextToSpeech()
+
+
+class VoiceActivityDetector:
+    """
+    Energy-based endpointing for 16-bit mono PCM
+
+    Speech starts after `onset_ms` of frames above the threshold and ends
+    after `silence_ms` below it. A short pre-roll is kept so the first
+    syllable is not clipped.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: float = -40.0,
+        onset_ms: int = 60,
+        silence_ms: int = 600,
+        preroll_ms: int = 200,
+        max_utterance_ms: int = 30000
+    ):
+        self.frame_bytes = sample_rate * _FRAME_MS // 1000 * 2
+        self.threshold_db = threshold_db
+        self.onset_frames = max(onset_ms // _FRAME_MS, 1)
+        self.silence_frames = max(silence_ms // _FRAME_MS, 1)
+        self.max_frames = max_utterance_ms // _FRAME_MS
+        self._pending = bytearray()
+        self._preroll: deque = deque(maxlen=max(preroll_ms // _FRAME_MS, 1))
+        self._utterance: list[bytes] = []
+        self._voiced_run = 0
+        self._silent_run = 0
+        self.in_speech = False
+
+    def feed(self, pcm: bytes) -> list[tuple[str, Optional[bytes]]]:
+        """
+        Consume PCM and return events
+
+        Returns:
+            List of ("speech_start", None) and ("speech_end", utterance_pcm)
+        """
+        self._pending.extend(pcm)
+        usable = len(self._pending) - len(self._pending) % self.frame_bytes
+        if usable == 0:
+            return []
+        chunk = bytes(self._pending[:usable])
+        del self._pending[:usable]
+
+        samples = np.frombuffer(chunk, dtype="<i2").astype(np.float32) / 32768.0
+        frames = samples.reshape(-1, self.frame_bytes // 2)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        voiced = 20 * np.log10(np.maximum(rms, 1e-10)) > self.threshold_db
+
+        events = []
+        for index, is_voiced in enumerate(voiced):
+            frame = chunk[index * self.frame_bytes:(index + 1) * self.frame_bytes]
+            if not self.in_speech:
+                self._preroll.append(frame)
+                self._voiced_run = self._voiced_run + 1 if is_voiced else 0
+                if self._voiced_run >= self.onset_frames:
+                    self.in_speech = True
+                    self._utterance = list(self._preroll)
+                    self._preroll.clear()
+                    self._silent_run = 0
+                    events.append(("speech_start", None))
+                continue
+
+            self._utterance.append(frame)
+            self._silent_run = 0 if is_voiced else self._silent_run + 1
+            if self._silent_run >= self.silence_frames or len(self._utterance) >= self.max_frames:
+                events.append(("speech_end", b"".join(self._utterance)))
+                self._utterance = []
+                self._voiced_run = 0
+                self.in_speech = False
+        return events
+
+    def flush(self) -> Optional[bytes]:
+        """Return any utterance in progress (e.g. when the caller hangs up)"""
+        if self.in_speech and self._utterance:
+            self.in_speech = False
+            utterance, self._utterance = b"".join(self._utterance), []
+            return utterance
+        return None
+
+
+class VoiceSession:
+    """One caller's duplex conversation"""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        stt: SpeechToText,
+        llm: LanguageModel,
+        tts: TextToSpeech,
+        sample_rate: int = 16000,
+        appointment_id: Optional[int] = None
+    ):
+        self.websocket = websocket
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.sample_rate = sample_rate
+        self.appointment_id = appointment_id
+        self.session_id = uuid.uuid4().hex
+        self.vad = VoiceActivityDetector(sample_rate, threshold_db=settings.VOICE_VAD_THRESHOLD_DB)
+        self.history: list[dict] = []
+        self.started_at = time.monotonic()
+        self.barge_ins = 0
+        self._utterances: asyncio.Queue = asyncio.Queue()
+        self._response_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+
+    async def _send_json(self, message: dict):
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(message))
+
+    async def _send_bytes(self, data: bytes):
+        async with self._send_lock:
+            await self.websocket.send_bytes(data)
+
+    def _responding(self) -> bool:
+        return self._response_task is not None and not self._response_task.done()
+
+    async def _barge_in(self):
+        """Cancel the reply in progress because the caller started talking"""
+        if self._responding():
+            self._response_task.cancel()
+            self.barge_ins += 1
+            logger.info(f"Voice session {self.session_id}: barge-in")
+            await self._send_json({"type": "barge_in"})
+
+    async def _respond(self):
+        """LLM then TTS for the current history; cancelled on barge-in"""
+        try:
+            await self._generate_reply()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Voice session {self.session_id}: reply failed: {e}")
+            await self._send_json({"type": "error", "detail": f"Failed to generate reply: {str(e)}"})
+
+    async def _generate_reply(self):
+        text = await self.llm.respond(list(self.history))
+        self.history.append({"role": "assistant", "content": text})
+        await self._send_json({"type": "response_text", "text": text})
+
+        audio = await self.tts.synthesize(text)
+        await self._send_json({"type": "response_audio_start", "format": self.tts.audio_format})
+        chunk_size = settings.VOICE_AUDIO_CHUNK_BYTES
+        for offset in range(0, len(audio), chunk_size):
+            await self._send_bytes(audio[offset:offset + chunk_size])
+            # Yield between chunks so a barge-in stops playback promptly
+            await asyncio.sleep(0)
+        await self._send_json({"type": "response_end"})
+
+    async def _transcription_worker(self):
+        """Transcribe utterances in order and start a reply after each one"""
+        while True:
+            utterance = await self._utterances.get()
+            if utterance is None:
+                return
+            try:
+                transcript = await self.stt.transcribe(utterance, self.sample_rate)
+            except Exception as e:
+                # Drop this utterance only; the caller can keep talking
+                logger.error(f"Voice session {self.session_id}: transcription failed: {e}")
+                await self._send_json({"type": "error", "detail": f"Failed to transcribe speech: {str(e)}"})
+                continue
+            if not transcript:
+                continue
+            self.history.append({"role": "user", "content": transcript})
+            await self._send_json({"type": "transcript", "text": transcript})
+            if self._responding():
+                self._response_task.cancel()
+            self._response_task = asyncio.create_task(self._respond())
+
+    async def _handle_control(self, message: dict) -> bool:
+        """Handle a JSON control message; returns False to end the session"""
+        if message.get("type") == "stop":
+            return False
+        if message.get("type") == "interrupt":
+            await self._barge_in()
+        return True
+
+    async def run(self):
+        """Receive audio until the caller hangs up, then record the session"""
+        await self._send_json({
+            "type": "session_started",
+            "session_id": self.session_id,
+            "sample_rate": self.sample_rate
+        })
+        worker = asyncio.create_task(self._transcription_worker())
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is not None:
+                    try:
+                        control = json.loads(message["text"])
+                    except ValueError:
+                        control = None
+                    if not isinstance(control, dict):
+                        # A malformed control message should not end the call
+                        await self._send_json({"type": "error", "detail": "Control messages must be JSON objects"})
+                        continue
+                    if not await self._handle_control(control):
+                        break
+                    continue
+                for event, utterance in self.vad.feed(message.get("bytes") or b""):
+                    if event == "speech_start":
+                        # Lets the client stop local playback of audio already sent
+                        await self._send_json({"type": "speech_start"})
+                        await self._barge_in()
+                    else:
+                        await self._utterances.put(utterance)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            remaining = self.vad.flush()
+            if remaining:
+                await self._utterances.put(remaining)
+            await self._utterances.put(None)
+            try:
+                await asyncio.wait_for(worker, timeout=settings.VOICE_DRAIN_SECONDS)
+                if self._responding():
+                    await asyncio.wait_for(self._response_task, timeout=settings.VOICE_DRAIN_SECONDS)
+            except (asyncio.CancelledError, Exception) as e:
+                # Caller already gone or drain deadline hit; nothing left to deliver
+                logger.debug(f"Voice session {self.session_id} drain stopped: {e!r}")
+            finally:
+                worker.cancel()
+                if self._response_task:
+                    self._response_task.cancel()
+            self._record_session()
+
+    @property
+    def duration_seconds(self) -> int:
+        return int(time.monotonic() - self.started_at)
+
+    def _record_session(self):
+        """Store session metadata on the linked appointment"""
+        logger.info(
+            f"Voice session {self.session_id} ended after {self.duration_seconds}s "
+            f"({len(self.history)} messages, {self.barge_ins} barge-ins)"
+        )
+        if self.appointment_id is None:
+            return
+        db = SessionLocal()
+        try:
+            appointment_service.update_appointment(db, self.appointment_id, {
+                "livekit_room_name": f"voice-{self.session_id[:12]}",
+                "livekit_session_id": self.session_id,
+                "call_duration_seconds": self.duration_seconds
+            })
+        except Exception as e:
+            logger.error(f"Failed to record voice session on appointment {self.appointment_id}: {e}")
+        finally:
+            db.close()
+
+
+class AgentDispatcher:
+    """Creates voice sessions and tracks the ones in progress"""
+
+    def __init__(self, backend: str = "groq"):
+        self.backend = backend
+        self.active_sessions: dict[str, VoiceSession] = {}
+
+    async def run_session(
+        self,
+        websocket: WebSocket,
+        sample_rate: int = 16000,
+        appointment_id: Optional[int] = None
+    ) -> VoiceSession:
+        """
+        Run a voice session on an accepted WebSocket until it ends
+
+        Args:
+            websocket: Accepted WebSocket connection
+            sample_rate: Sample rate of the caller's 16-bit mono PCM
+            appointment_id: Appointment to record the session on
+
+        Returns:
+            Finished session
+        """
+        stt, llm, tts = build_backends(self.backend)
+        session = VoiceSession(websocket, stt, llm, tts, sample_rate, appointment_id)
+        self.active_sessions[session.session_id] = session
+        try:
+            await session.run()
+        finally:
+            self.active_sessions.pop(session.session_id, None)
+        return session
+
+
+# Global instance
+agent_dispatcher = AgentDispatcher(backend=settings.VOICE_BACKEND)
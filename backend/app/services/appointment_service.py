@@ -1,10 +1,18 @@
 """
 Appointment scheduling service
 """
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
+from itertools import islice
+from typing import Optional
+import heapq
 from ..models import Appointment, AppointmentStatus, AppointmentType
 from ..config import settings
+from .response_cache import response_cache
+from .event_bus import event_bus
+from .stats_service import stats_service
+from .archive_service import archive_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +21,17 @@ logger = logging.getLogger(__name__)
 class AppointmentService:
     """Service for managing appointments"""
     
+    @staticmethod
+    def _event_summary(appointment: Appointment) -> dict:
+        """Small summary of an appointment for change feed events"""
+        return {
+            "status": appointment.status.value if appointment.status else None,
+            "appointment_type": appointment.appointment_type.value if appointment.appointment_type else None,
+            "appointment_date": appointment.appointment_date.isoformat() if appointment.appointment_date else None,
+            "department": appointment.department,
+            "doctor_name": appointment.doctor_name
+        }
+    
     @staticmethod
     def create_appointment(db: Session, appointment_data: dict) -> Appointment:
         """
@@ -28,8 +47,12 @@ class AppointmentService:
         try:
             appointment = Appointment(**appointment_data)
             db.add(appointment)
+            db.flush()
+            stats_service.apply_delta(db, stats_service.dimension_keys(None), stats_service.dimension_keys(appointment))
             db.commit()
             db.refresh(appointment)
+            response_cache.invalidate()
+            event_bus.publish("created", appointment.id, AppointmentService._event_summary(appointment))
             logger.info(f"Created appointment {appointment.id} for {appointment.patient_name}")
             return appointment
         except Exception as e:
@@ -39,15 +62,19 @@ class AppointmentService:
     
     @staticmethod
     def get_appointment(db: Session, appointment_id: int) -> Appointment:
-        """Get appointment by ID"""
-        return db.query(Appointment).filter(Appointment.id == appointment_id).first()
+        """Get appointment by ID, falling back to the archive"""
+        appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+        if appointment is None:
+            appointment = archive_service.get_archived(db, appointment_id)
+        return appointment
     
     @staticmethod
     def get_appointments(
         db: Session,
         skip: int = 0,
         limit: int = 100,
-        status: AppointmentStatus = None
+        status: AppointmentStatus = None,
+        include_archived: bool = False
     ) -> list[Appointment]:
         """
         Get list of appointments with optional filtering
@@ -57,6 +84,7 @@ class AppointmentService:
             skip: Number of records to skip
             limit: Maximum number of records to return
             status: Filter by appointment status
+            include_archived: Also list archived appointments
             
         Returns:
             List of appointments
@@ -66,7 +94,15 @@ class AppointmentService:
         if status:
             query = query.filter(Appointment.status == status)
         
-        return query.order_by(Appointment.appointment_date.desc()).offset(skip).limit(limit).all()
+        query = query.order_by(Appointment.appointment_date.desc())
+        if not include_archived:
+            return query.offset(skip).limit(limit).all()
+
+        # Page through both tables merged by date: the top skip+limit of each suffices
+        live = query.limit(skip + limit).all()
+        archived = archive_service.get_archived_list(db, skip + limit, status)
+        merged = heapq.merge(live, archived, key=lambda apt: apt.appointment_date, reverse=True)
+        return list(islice(merged, skip, skip + limit))
     
     @staticmethod
     def update_appointment(
@@ -90,13 +126,18 @@ class AppointmentService:
             if not appointment:
                 raise ValueError(f"Appointment {appointment_id} not found")
             
+            stats_before = stats_service.dimension_keys(appointment)
             for key, value in update_data.items():
                 if hasattr(appointment, key):
                     setattr(appointment, key, value)
             
             appointment.updated_at = datetime.utcnow()
+            stats_service.apply_delta(db, stats_before, stats_service.dimension_keys(appointment))
             db.commit()
             db.refresh(appointment)
+            response_cache.invalidate()
+            event_type = "cancelled" if update_data.get("status") == AppointmentStatus.CANCELLED else "updated"
+            event_bus.publish(event_type, appointment.id, AppointmentService._event_summary(appointment))
             logger.info(f"Updated appointment {appointment_id}")
             return appointment
         except Exception as e:
@@ -114,28 +155,45 @@ class AppointmentService:
         )
     
     @staticmethod
-    def get_available_slots(db: Session, date: datetime, duration_minutes: int = 30) -> list:
+    def get_active_appointments_between(
+        db: Session,
+        start: datetime,
+        end: datetime,
+        department: Optional[str] = None
+    ) -> list[Appointment]:
+        """Get non-cancelled appointments in [start, end), optionally for one department"""
+        query = db.query(Appointment).filter(
+            Appointment.appointment_date >= start,
+            Appointment.appointment_date < end,
+            Appointment.status != AppointmentStatus.CANCELLED
+        )
+        if department:
+            query = query.filter(Appointment.department == department)
+        return query.all()
+
+    @staticmethod
+    def compute_free_slots(
+        existing_appointments: list,
+        date: datetime,
+        duration_minutes: int = 30,
+        department: Optional[str] = None
+    ) -> list:
         """
-        Get available appointment slots for a given date
-        
+        Compute free slots for a day from already-loaded appointments
+
         Args:
-            db: Database session
-            date: Date to check availability
+            existing_appointments: Non-cancelled appointments around that day
+            date: Day to compute slots for
             duration_minutes: Appointment duration
-            
+            department: Only count appointments of this department as busy
+
         Returns:
             List of available datetime slots
         """
-        # Get existing appointments for the day
         start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        existing_appointments = db.query(Appointment).filter(
-            Appointment.appointment_date >= start_of_day,
-            Appointment.appointment_date < end_of_day,
-            Appointment.status != AppointmentStatus.CANCELLED
-        ).all()
-        
+        if department:
+            existing_appointments = [apt for apt in existing_appointments if apt.department == department]
+
         # Generate all possible slots
         available_slots = []
         working_start = settings.WORKING_HOURS_START
@@ -143,6 +201,7 @@ class AppointmentService:
         
         current_time = start_of_day.replace(hour=working_start, minute=0)
         end_time = start_of_day.replace(hour=working_end, minute=0)
+        now = datetime.utcnow()
         
         while current_time < end_time:
             # Check if slot is available
@@ -156,13 +215,103 @@ class AppointmentService:
                     is_available = False
                     break
             
-            if is_available and current_time > datetime.utcnow():
+            if is_available and current_time > now:
                 available_slots.append(current_time)
             
             current_time += timedelta(minutes=duration_minutes)
         
         return available_slots
 
+    @staticmethod
+    def get_available_slots(
+        db: Session,
+        date: datetime,
+        duration_minutes: int = 30,
+        department: Optional[str] = None
+    ) -> list:
+        """
+        Get available appointment slots for a given date
+        
+        Args:
+            db: Database session
+            date: Date to check availability
+            duration_minutes: Appointment duration
+            department: Only treat this department's appointments as busy
+            
+        Returns:
+            List of available datetime slots
+        """
+        # Get existing appointments for the day
+        start_of_day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_of_day = start_of_day + timedelta(days=1)
+        
+        existing_appointments = AppointmentService.get_active_appointments_between(
+            db, start_of_day, end_of_day, department
+        )
+        return AppointmentService.compute_free_slots(existing_appointments, date, duration_minutes)
+
+    @staticmethod
+    def book_first_available(
+        db: Session,
+        appointment_data: dict,
+        candidate_slots: list,
+        duration_minutes: int = 30
+    ) -> Optional[Appointment]:
+        """
+        Book the first candidate slot that is still free
+
+        Each candidate is re-checked and inserted in one transaction that
+        holds the database write lock from the start, so concurrent bookings
+        in any worker process cannot take the same slot, even if the
+        candidates were computed from a stale read. Blocking while another
+        booking holds the lock; call it from a worker thread.
+
+        Args:
+            db: Database session
+            appointment_data: Appointment fields (appointment_date is filled in)
+            candidate_slots: Slots in order of preference
+            duration_minutes: Appointment duration
+
+        Returns:
+            Created appointment, or None if every candidate was taken
+        """
+        department = appointment_data.get("department")
+        try:
+            AppointmentService._begin_locked(db)
+            for slot in candidate_slots:
+                conflicts = AppointmentService.get_active_appointments_between(
+                    db,
+                    slot - timedelta(minutes=duration_minutes - 1),
+                    slot + timedelta(minutes=duration_minutes),
+                    department
+                )
+                if conflicts:
+                    continue
+                # Commits, which ends the locked transaction
+                return AppointmentService.create_appointment(db, {**appointment_data, "appointment_date": slot})
+        except Exception:
+            db.rollback()
+            raise
+        db.rollback()
+        return None
+
+    @staticmethod
+    def _begin_locked(db: Session):
+        """
+        Start a transaction that excludes other writers until it ends
+
+        SQLite takes its write lock with BEGIN IMMEDIATE (waiting up to the
+        busy timeout if another process holds it); PostgreSQL locks the
+        appointments table against concurrent writes.
+        """
+        # BEGIN must come first on the connection, so end any open transaction
+        db.commit()
+        dialect = db.get_bind().dialect.name
+        if dialect == "sqlite":
+            db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+        elif dialect == "postgresql":
+            db.execute(text("LOCK TABLE appointments IN SHARE ROW EXCLUSIVE MODE"))
+
 
 # Global instance
 appointment_service = AppointmentService()
@@ -0,0 +1,208 @@
+"""
+Hot/cold archival of finished appointments
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+import asyncio
+import logging
+import time
+
+from sqlalchemy import DateTime, delete, exists, insert, literal, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Appointment, AppointmentStatus, ArchivedAppointment
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+ARCHIVABLE_STATUSES = (AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED)
+
+_COLUMNS = [column.name for column in Appointment.__table__.columns]
+
+
+class ArchiveService:
+    """
+    Moves old completed and cancelled appointments to appointments_archive
+
+    Each batch copies up to `batch_size` rows with one INSERT ... SELECT,
+    deletes them from the live table and commits, so locks are held for one
+    short transaction at a time and writers can get in between batches.
+    Statistics are not touched: aggregates keep counting archived rows.
+    """
+
+    @staticmethod
+    def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+        """
+        Archive one batch of finished appointments dated before cutoff
+
+        Rows whose id is already taken in the archive are skipped; they can
+        only exist in databases that reused ids before AUTOINCREMENT.
+
+        Returns:
+            Number of rows moved
+        """
+        live = Appointment.__table__
+        archived = ArchivedAppointment.__table__
+        ids = db.scalars(
+            select(live.c.id).where(
+                live.c.status.in_(ARCHIVABLE_STATUSES),
+                live.c.appointment_date < cutoff,
+                ~exists().where(archived.c.id == live.c.id)
+            ).order_by(live.c.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return 0
+
+        try:
+            db.execute(insert(archived).from_select(
+                _COLUMNS + ["archived_at"],
+                select(
+                    *[live.c[name] for name in _COLUMNS],
+                    literal(datetime.utcnow(), DateTime).label("archived_at")
+                ).where(live.c.id.in_(ids))
+            ))
+            db.execute(delete(live).where(live.c.id.in_(ids)))
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            return ArchiveService._resolve_conflict(db, ids, e)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error archiving appointments: {e}")
+            raise
+        return len(ids)
+
+    @staticmethod
+    def _resolve_conflict(db: Session, ids: list[int], error: IntegrityError) -> int:
+        """
+        Handle a batch whose rows showed up in the archive after selection
+
+        If every conflicting archived row is a copy of the live row, another
+        worker already moved it and only the live copy is removed. Anything
+        else, such as a different row under the same id, re-raises error.
+
+        Returns:
+            Number of live rows removed
+        """
+        live = Appointment.__table__
+        archived = ArchivedAppointment.__table__
+        columns = [live.c[name] for name in _COLUMNS]
+        live_rows = {row.id: tuple(row) for row in db.execute(select(*columns).where(live.c.id.in_(ids)))}
+        archived_rows = {
+            row.id: tuple(row)
+            for row in db.execute(select(*[archived.c[name] for name in _COLUMNS]).where(archived.c.id.in_(ids)))
+        }
+        duplicates = [appointment_id for appointment_id in archived_rows if appointment_id in live_rows]
+        different = [appointment_id for appointment_id in duplicates if live_rows[appointment_id] != archived_rows[appointment_id]]
+        if different:
+            logger.error(f"Archived appointments {different} differ from live rows with the same id")
+            raise error
+        if not duplicates:
+            logger.error(f"Error archiving appointments: {error}")
+            raise error
+
+        try:
+            db.execute(delete(live).where(live.c.id.in_(duplicates)))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error archiving appointments: {e}")
+            raise
+        logger.info(f"{len(duplicates)} appointments were already archived by another worker")
+        return len(duplicates)
+
+    @staticmethod
+    def archive(
+        db: Session,
+        older_than_days: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        pause_seconds: float = 0.01
+    ) -> int:
+        """
+        Archive all finished appointments older than the retention window
+
+        Args:
+            db: Database session
+            older_than_days: Keep finished appointments this recent (default ARCHIVE_AFTER_DAYS)
+            batch_size: Rows per transaction (default ARCHIVE_BATCH_SIZE)
+            pause_seconds: Sleep between batches so other writers get the lock
+
+        Returns:
+            Number of rows moved
+        """
+        if older_than_days is None:
+            older_than_days = settings.ARCHIVE_AFTER_DAYS
+        batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+        started = time.perf_counter()
+        moved = 0
+        while True:
+            count = ArchiveService.archive_batch(db, cutoff, batch_size)
+            moved += count
+            if count < batch_size:
+                break
+            time.sleep(pause_seconds)
+
+        if moved:
+            # Default listings no longer contain these rows
+            response_cache.invalidate()
+            logger.info(
+                f"Archived {moved} appointments older than {older_than_days} days "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms"
+            )
+        return moved
+
+    @staticmethod
+    def get_archived(db: Session, appointment_id: int) -> Optional[ArchivedAppointment]:
+        """Get an archived appointment by its original ID"""
+        return db.get(ArchivedAppointment, appointment_id)
+
+    @staticmethod
+    def get_archived_list(
+        db: Session,
+        limit: int,
+        status: Optional[AppointmentStatus] = None
+    ) -> list[ArchivedAppointment]:
+        """Most recent archived appointments by appointment date"""
+        if status is not None and status not in ARCHIVABLE_STATUSES:
+            return []
+        query = db.query(ArchivedAppointment)
+        if status:
+            query = query.filter(ArchivedAppointment.status == status)
+        return query.order_by(ArchivedAppointment.appointment_date.desc()).limit(limit).all()
+
+    async def run_periodically(self, interval_seconds: float):
+        """Archive in a worker thread every interval until cancelled"""
+        def run_once():
+            db = SessionLocal()
+            try:
+                return self.archive(db)
+            finally:
+                db.close()
+
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(run_once)
+            except Exception as e:
+                logger.error(f"Scheduled archival failed: {e}")
+
+
+# Global instance
+archive_service = ArchiveService()
+
+
+if __name__ == "__main__":
+    # One-off archival: python -m app.services.archive_service
+    from ..database import init_db
+    init_db()
+    session = SessionLocal()
+    try:
+        count = archive_service.archive(session)
+        print(f"Archived {count} appointments")
+    finally:
+        session.close()
@@ -0,0 +1,346 @@
+"""
+Audio preprocessing to shrink STT payloads
+"""
+from dataclasses import dataclass, asdict
+from typing import BinaryIO, Optional
+import io
+import math
+import tempfile
+import wave
+import logging
+
+import numpy as np
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+_SAMPLE_DTYPES = {1: np.uint8, 2: "<i2", 4: "<i4"}
+_FRAME_MS = 20
+_BLOCK_FRAMES = 1 << 16  # WAV frames decoded per step
+_SPOOL_MAX_BYTES = 1 << 20  # Processed audio above this goes to disk
+
+
+@dataclass
+class PreprocessingResult:
+    """Outcome of preprocessing one recording"""
+    original_bytes: int
+    processed_bytes: int
+    original_sample_rate: int
+    original_channels: int
+    original_seconds: float
+    processed_seconds: float
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.processed_bytes
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["bytes_saved"] = self.bytes_saved
+        return data
+
+
+class _Resampler:
+    """
+    Low-pass filter and resample mono audio block by block
+
+    The FIR filter runs by FFT overlap-add, carrying the convolution tail
+    from one block to the next and compensating its delay, so the output is
+    the same as filtering the whole recording at once but only one block is
+    in memory at a time.
+    """
+
+    def __init__(self, taps: Optional[np.ndarray], sample_rate: int, target_rate: int, total: int):
+        self.taps = taps
+        self.sample_rate = sample_rate
+        self.target_rate = target_rate
+        self.total = total
+        if taps is None:
+            return
+        self._spectra: dict[int, np.ndarray] = {}
+        self._tail = np.zeros(len(taps) - 1, dtype=np.float32)
+        self._skip = (len(taps) - 1) // 2  # filter delay
+        self._filtered = 0  # delay-compensated samples emitted so far
+        self._step = sample_rate / target_rate
+        if sample_rate % target_rate == 0:
+            self._ratio = sample_rate // target_rate
+        else:
+            self._ratio = None
+            self._produced = 0
+            self._output_total = int(total / sample_rate * target_rate)
+            self._previous: Optional[np.ndarray] = None
+
+    def feed(self, samples: np.ndarray) -> np.ndarray:
+        """Resample the next block, returning whatever output it completes"""
+        if self.taps is None:
+            # At or below the target rate: kept as is
+            return samples
+        taps_count = len(self.taps)
+        fft_size = 1 << (len(samples) + taps_count - 2).bit_length()
+        if fft_size not in self._spectra:
+            self._spectra[fft_size] = np.fft.rfft(self.taps, fft_size)
+        length = len(samples) + taps_count - 1
+        convolved = np.fft.irfft(np.fft.rfft(samples, fft_size) * self._spectra[fft_size], fft_size)[:length]
+        convolved[:taps_count - 1] += self._tail
+        self._tail = convolved[len(samples):].astype(np.float32)
+        return self._pick(convolved[:len(samples)])
+
+    def flush(self) -> np.ndarray:
+        """Output still held back by the filter delay"""
+        if self.taps is None:
+            return np.zeros(0, dtype=np.float32)
+        tail, self._tail = self._tail, np.zeros(0, dtype=np.float32)
+        return self._pick(tail)
+
+    def _pick(self, filtered: np.ndarray) -> np.ndarray:
+        """Drop the filter delay, then decimate or interpolate at the global sample positions"""
+        if self._skip:
+            skipped = min(self._skip, len(filtered))
+            filtered = filtered[skipped:]
+            self._skip -= skipped
+        filtered = filtered[:self.total - self._filtered].astype(np.float32)
+        start = self._filtered
+        self._filtered += len(filtered)
+        if not len(filtered):
+            return filtered
+
+        if self._ratio is not None:
+            # Integer ratio (48k, 32k): plain decimation
+            return filtered[(-start) % self._ratio::self._ratio]
+
+        # Arbitrary ratio (44.1k): linear interpolation, bridging blocks with the previous sample
+        if self._previous is not None:
+            buffer, base = np.concatenate([self._previous, filtered]), start - 1
+        else:
+            buffer, base = filtered, start
+        self._previous = filtered[-1:]
+        last = min(self._output_total, int((start + len(filtered) - 1) / self._step) + 1)
+        positions = np.arange(self._produced, last) * self._step - base
+        self._produced = max(last, self._produced)
+        return np.interp(positions, np.arange(len(buffer)), buffer).astype(np.float32)
+
+
+class AudioPreprocessor:
+    """
+    Downmix, resample and trim silence from WAV recordings
+
+    Whisper works on 16kHz mono internally, so anything above that is
+    upload time and payload size without benefit, and leading/trailing
+    silence is billed and transcribed like speech. Only PCM WAV is
+    handled; other containers (e.g. browser webm/opus) are passed through
+    unchanged since they are already compressed.
+    """
+
+    def __init__(
+        self,
+        target_sample_rate: int = 16000,
+        silence_threshold_db: float = -45.0,
+        padding_ms: int = 200
+    ):
+        self.target_sample_rate = target_sample_rate
+        self.silence_threshold_db = silence_threshold_db
+        self.padding_ms = padding_ms
+
+    @staticmethod
+    def decode_frames(frames: bytes, sample_width: int, channels: int) -> Optional[np.ndarray]:
+        """Decode raw PCM frames to float32 samples in [-1, 1], shaped (frames, channels)"""
+        dtype = _SAMPLE_DTYPES.get(sample_width)
+        if dtype is None:
+            return None
+
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float32)
+        if sample_width == 1:
+            samples = (samples - 128.0) / 128.0
+        else:
+            samples /= float(2 ** (8 * sample_width - 1))
+        return samples[: len(samples) - len(samples) % channels].reshape(-1, channels)
+
+    def _lowpass_taps(self, sample_rate: int) -> np.ndarray:
+        """Blackman-windowed sinc low-pass whose stopband starts at the target Nyquist"""
+        numtaps = 64 * math.ceil(sample_rate / self.target_sample_rate) + 1
+        transition = 5.5 / numtaps  # Blackman main lobe, in cycles per sample
+        cutoff = self.target_sample_rate / 2 / sample_rate - transition / 2
+        n = np.arange(numtaps) - (numtaps - 1) / 2
+        taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(numtaps)
+        return (taps / taps.sum()).astype(np.float32)
+
+    def _resampler(self, sample_rate: int, total: int) -> _Resampler:
+        """Streaming resampler from sample_rate to (at most) the target rate"""
+        if sample_rate <= self.target_sample_rate:
+            return _Resampler(None, sample_rate, sample_rate, total)
+        # Remove everything above the target Nyquist first, or it aliases into the speech band
+        return _Resampler(self._lowpass_taps(sample_rate), sample_rate, self.target_sample_rate, total)
+
+    def _resample(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """Resample mono audio to the target rate"""
+        resampler = self._resampler(sample_rate, len(samples))
+        parts = [resampler.feed(samples[start:start + _BLOCK_FRAMES]) for start in range(0, len(samples), _BLOCK_FRAMES)]
+        parts.append(resampler.flush())
+        return np.concatenate(parts)
+
+    def frame_energy_db(self, samples: np.ndarray, sample_rate: int) -> tuple[np.ndarray, int]:
+        """
+        Compute per-frame RMS energy in dBFS
+
+        Returns:
+            (energy per 20ms frame, frame size in samples)
+        """
+        frame_size = max(sample_rate * _FRAME_MS // 1000, 1)
+        frame_count = len(samples) // frame_size
+        frames = samples[: frame_count * frame_size].reshape(frame_count, frame_size)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        return 20 * np.log10(np.maximum(rms, 1e-10)), frame_size
+
+    @staticmethod
+    def _pcm16(samples: np.ndarray) -> bytes:
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    @staticmethod
+    def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+        """Encode mono float samples as 16-bit PCM WAV"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(sample_rate)
+            wav_file.writeframes(AudioPreprocessor._pcm16(samples))
+        return buffer.getvalue()
+
+    def to_mono(self, samples: np.ndarray, sample_rate: int) -> tuple[np.ndarray, int]:
+        """
+        Downmix decoded samples and resample to (at most) the target rate
+
+        Returns:
+            (mono samples, output sample rate)
+        """
+        mono = samples.mean(axis=1) if samples.shape[1] > 1 else samples[:, 0]
+        return self._resample(mono, sample_rate), min(sample_rate, self.target_sample_rate)
+
+    def process_file(self, fileobj: BinaryIO) -> Optional[tuple[BinaryIO, PreprocessingResult]]:
+        """
+        Preprocess an uploaded file object, leaving it rewound
+
+        The WAV is decoded, downmixed and resampled _BLOCK_FRAMES at a time
+        and the result is written to a spooled temp file, so memory stays
+        bounded whatever the upload size. Blocking; call it from a worker
+        thread rather than the event loop.
+
+        Returns:
+            (processed WAV file positioned at 0, result summary), or None if
+            the input is not a supported PCM WAV file or would not get
+            smaller. The caller closes the returned file.
+        """
+        fileobj.seek(0, 2)
+        original_bytes = fileobj.tell()
+        fileobj.seek(0)
+        try:
+            return self._process_stream(fileobj, original_bytes)
+        finally:
+            fileobj.seek(0)
+
+    def _process_stream(self, fileobj: BinaryIO, original_bytes: int) -> Optional[tuple[BinaryIO, PreprocessingResult]]:
+        try:
+            wav_file = wave.open(fileobj, "rb")
+        except (wave.Error, EOFError):
+            return None
+
+        with wav_file, tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES) as pcm:
+            channels = wav_file.getnchannels()
+            sample_width = wav_file.getsampwidth()
+            sample_rate = wav_file.getframerate()
+            if _SAMPLE_DTYPES.get(sample_width) is None or not sample_rate:
+                return None
+
+            # Resampled mono PCM goes to pcm; only 20ms frame energies stay in memory
+            output_rate = min(sample_rate, self.target_sample_rate)
+            frame_size = max(output_rate * _FRAME_MS // 1000, 1)
+            resampler = self._resampler(sample_rate, wav_file.getnframes())
+            energies, pending = [], np.zeros(0, dtype=np.float32)
+            read_frames = written = 0
+            while True:
+                frames = wav_file.readframes(_BLOCK_FRAMES)
+                if frames:
+                    samples = self.decode_frames(frames, sample_width, channels)
+                    read_frames += len(samples)
+                    mono = samples.mean(axis=1) if channels > 1 else samples[:, 0]
+                    output = resampler.feed(mono)
+                else:
+                    output = resampler.flush()
+                pcm.write(self._pcm16(output))
+                written += len(output)
+                pending = np.concatenate([pending, output])
+                complete = len(pending) - len(pending) % frame_size
+                if complete:
+                    energies.append(self.frame_energy_db(pending[:complete], output_rate)[0])
+                    pending = pending[complete:]
+                if not frames:
+                    break
+
+            # Cut leading and trailing frames whose energy is below the threshold
+            start, end = 0, written
+            energy_db = np.concatenate(energies) if energies else np.zeros(0)
+            voiced = np.flatnonzero(energy_db > self.silence_threshold_db)
+            if len(voiced):
+                padding = self.padding_ms // _FRAME_MS
+                start = max(voiced[0] - padding, 0) * frame_size
+                end = min((voiced[-1] + 1 + padding) * frame_size, written)
+
+            processed = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_BYTES)
+            with wave.open(processed, "wb") as output_wav:
+                output_wav.setnchannels(1)
+                output_wav.setsampwidth(2)
+                output_wav.setframerate(output_rate)
+                pcm.seek(start * 2)
+                remaining = (end - start) * 2
+                while remaining > 0:
+                    chunk = pcm.read(min(remaining, _BLOCK_FRAMES * 2))
+                    if not chunk:
+                        break
+                    output_wav.writeframesraw(chunk)
+                    remaining -= len(chunk)
+
+        processed_bytes = processed.tell()
+        if processed_bytes >= original_bytes:
+            processed.close()
+            return None
+        processed.seek(0)
+
+        result = PreprocessingResult(
+            original_bytes=original_bytes,
+            processed_bytes=processed_bytes,
+            original_sample_rate=sample_rate,
+            original_channels=channels,
+            original_seconds=round(read_frames / sample_rate, 3),
+            processed_seconds=round((end - start) / output_rate, 3)
+        )
+        logger.info(
+            f"Preprocessed audio: {result.original_bytes} -> {result.processed_bytes} bytes "
+            f"({result.bytes_saved} saved), {result.original_seconds}s -> {result.processed_seconds}s"
+        )
+        return processed, result
+
+    def process(self, data: bytes) -> Optional[tuple[bytes, PreprocessingResult]]:
+        """
+        Preprocess a recording held in memory
+
+        Args:
+            data: Raw uploaded file contents
+
+        Returns:
+            (processed WAV bytes, result summary), or None if the input
+            is not a supported PCM WAV file or would not get smaller
+        """
+        processed = self.process_file(io.BytesIO(data))
+        if processed is None:
+            return None
+        output, result = processed
+        with output:
+            return output.read(), result
+
+
+# Global instance
+audio_preprocessor = AudioPreprocessor(
+    target_sample_rate=settings.AUDIO_TARGET_SAMPLE_RATE,
+    silence_threshold_db=settings.AUDIO_SILENCE_THRESHOLD_DB
+)
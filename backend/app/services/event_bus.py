@@ -0,0 +1,293 @@
+"""
+Change feed for appointment events
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+import asyncio
+import json
+import threading
+import logging
+
+from sqlalchemy import delete, insert, select
+
+from ..config import settings
+from ..database import engine
+from ..models import AppointmentEventRecord
+from .response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AppointmentEvent:
+    """A single appointment change"""
+    id: int
+    type: str
+    appointment_id: Optional[int]
+    data: dict
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_sse(self) -> str:
+        """Format the event as a Server-Sent Events frame"""
+        payload = json.dumps({
+            "id": self.id,
+            "type": self.type,
+            "appointment_id": self.appointment_id,
+            "data": self.data,
+            "created_at": self.created_at.isoformat()
+        }, default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class _Subscriber:
+    """Wake-up handle for one connected client"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.wakeup = asyncio.Event()
+
+
+class AppointmentEventBus:
+    """
+    Shared, bounded event log with wake-up fan-out
+
+    Events are appended once to a ring buffer; subscribers only receive a
+    wake-up signal and read the new events from the shared log themselves,
+    so publishing costs the same regardless of how many dashboards listen
+    and no per-subscriber copies are queued. A subscriber that reconnects
+    with its last seen id replays what it missed as long as the events are
+    still in the buffer, otherwise it gets a ``reset`` event and should
+    refetch.
+
+    With ``shared=True`` (several worker processes) events are appended to
+    the appointment_events table instead, whose autoincrement id is the one
+    event sequence for all workers. Every worker tails that table into its
+    own buffer, so a client sees writes handled by any worker and can resume
+    on any worker with its Last-Event-ID.
+    """
+
+    def __init__(self, buffer_size: int = 1000, shared: bool = False):
+        self._events: "deque[AppointmentEvent]" = deque(maxlen=buffer_size)
+        self._subscribers: set[_Subscriber] = set()
+        self._next_id = 1
+        self._closed = False
+        self._lock = threading.Lock()
+        self._shared = shared
+        self._loaded = False
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def last_event_id(self) -> int:
+        """Id of the most recently published event (0 if none)"""
+        return self._next_id - 1
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of connected subscribers"""
+        return len(self._subscribers)
+
+    def publish(self, event_type: str, appointment_id: Optional[int], data: Optional[dict] = None) -> Optional[AppointmentEvent]:
+        """
+        Append an event and wake all subscribers
+
+        Safe to call from synchronous code and from any thread.
+
+        Args:
+            event_type: created, updated, cancelled or rescheduled
+            appointment_id: ID of the affected appointment, or None for bulk changes
+            data: Small JSON-serializable summary of the change
+
+        Returns:
+            Published event, or None if it could not be written to the shared log
+        """
+        published = self.publish_many([(event_type, appointment_id, data)])
+        return published[0] if published else None
+
+    def publish_many(self, changes: list[tuple]) -> list[AppointmentEvent]:
+        """
+        Append several events at once (one transaction in shared mode)
+
+        Args:
+            changes: (event_type, appointment_id, data) tuples
+
+        Returns:
+            Published events
+        """
+        if self._shared:
+            return self._publish_shared(changes)
+
+        with self._lock:
+            events = []
+            for event_type, appointment_id, data in changes:
+                event = AppointmentEvent(
+                    id=self._next_id,
+                    type=event_type,
+                    appointment_id=appointment_id,
+                    data=data or {}
+                )
+                self._next_id += 1
+                self._events.append(event)
+                events.append(event)
+            subscribers = list(self._subscribers)
+        self._wake(subscribers)
+        return events
+
+    def _publish_shared(self, changes: list[tuple]) -> list[AppointmentEvent]:
+        """Write events to the shared log, then pull them into this worker's buffer"""
+        table = AppointmentEventRecord.__table__
+        events = []
+        try:
+            with engine.begin() as connection:
+                for event_type, appointment_id, data in changes:
+                    event = AppointmentEvent(id=0, type=event_type, appointment_id=appointment_id, data=data or {})
+                    result = connection.execute(insert(table).values(
+                        type=event.type,
+                        appointment_id=event.appointment_id,
+                        data=event.data,
+                        created_at=event.created_at
+                    ))
+                    event.id = result.inserted_primary_key[0]
+                    events.append(event)
+                if events:
+                    # Keep about one buffer's worth of history in the table
+                    connection.execute(delete(table).where(table.c.id <= events[-1].id - self._events.maxlen))
+        except Exception as e:
+            # The change itself is already committed; only the notification is lost
+            logger.error(f"Error recording appointment events: {e}")
+            return []
+        self.refresh(frozenset(event.id for event in events))
+        return events
+
+    def refresh(self, local_ids: frozenset = frozenset()) -> int:
+        """
+        Pull events written by any worker from the shared log into the buffer
+
+        Events from other workers also clear this worker's response cache,
+        which their writes could not reach. Blocking; call it from a worker
+        thread inside the event loop.
+
+        Args:
+            local_ids: Ids of events this worker just published itself
+
+        Returns:
+            Number of new events
+        """
+        if not self._shared:
+            return 0
+        table = AppointmentEventRecord.__table__
+        with self._refresh_lock:
+            with engine.connect() as connection:
+                if self._loaded:
+                    rows = connection.execute(
+                        select(table).where(table.c.id > self.last_event_id).order_by(table.c.id)
+                    ).all()
+                else:
+                    rows = connection.execute(
+                        select(table).order_by(table.c.id.desc()).limit(self._events.maxlen)
+                    ).all()[::-1]
+            first_load = not self._loaded
+            self._loaded = True
+            if not rows:
+                return 0
+            if not first_load and any(row.id not in local_ids for row in rows):
+                response_cache.invalidate()
+            with self._lock:
+                for row in rows:
+                    self._events.append(AppointmentEvent(
+                        id=row.id,
+                        type=row.type,
+                        appointment_id=row.appointment_id,
+                        data=row.data or {},
+                        created_at=row.created_at
+                    ))
+                self._next_id = rows[-1].id + 1
+                subscribers = list(self._subscribers)
+        self._wake(subscribers)
+        return len(rows)
+
+    async def run_poller(self, interval_seconds: float):
+        """Pick up events published by other workers every interval until cancelled"""
+        while not self._closed:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Error reading shared change feed: {e}")
+            await asyncio.sleep(interval_seconds)
+
+    def _wake(self, subscribers: list):
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.wakeup.set)
+            except RuntimeError:
+                # Event loop already closed; the subscriber is gone
+                with self._lock:
+                    self._subscribers.discard(subscriber)
+
+    def close(self):
+        """End all open streams (used when the server starts draining)"""
+        with self._lock:
+            self._closed = True
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.wakeup.set)
+            except RuntimeError:
+                pass
+
+    def events_since(self, last_id: int) -> Optional[list[AppointmentEvent]]:
+        """
+        Get events newer than last_id
+
+        Returns:
+            List of events, or None if some were already evicted from the buffer
+        """
+        with self._lock:
+            if last_id > self._next_id - 1:
+                # Client saw ids from before a restart
+                return None
+            if not self._events or last_id >= self._events[-1].id:
+                return []
+            if last_id < self._events[0].id - 1:
+                return None
+            return [event for event in self._events if event.id > last_id]
+
+    async def stream(self, last_id: Optional[int] = None, heartbeat_seconds: float = 15.0):
+        """
+        Yield SSE frames for new events, starting after last_id
+
+        Args:
+            last_id: Last event id seen by the client (None to start from now)
+            heartbeat_seconds: Interval for keep-alive comments
+        """
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        if self._shared:
+            # The client may have seen newer events on another worker
+            await asyncio.to_thread(self.refresh)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            cursor = self.last_event_id if last_id is None else last_id
+        try:
+            yield "retry: 3000\n\n"
+            while not self._closed:
+                events = self.events_since(cursor)
+                if events is None:
+                    cursor = self.last_event_id
+                    yield f"id: {cursor}\nevent: reset\ndata: {{}}\n\n"
+                    continue
+                for event in events:
+                    cursor = event.id
+                    yield event.to_sse()
+                try:
+                    await asyncio.wait_for(subscriber.wakeup.wait(), timeout=heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                subscriber.wakeup.clear()
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+
+# Global instance
+event_bus = AppointmentEventBus(buffer_size=settings.EVENT_BUFFER_SIZE, shared=settings.EVENT_SHARED_LOG)
@@ -1,46 +1,101 @@
 """
 Groq AI service for STT, LLM, and TTS
 """
-from groq import Groq
-import aiohttp
+from pydantic import ValidationError
 from ..config import settings
+from ..metrics import track_upstream, record_llm_usage
+from ..schemas import TriageResponse
+from ..tracing import span
+import asyncio
+import threading
 import logging
 import io
+import json
 import base64
 
 logger = logging.getLogger(__name__)
 
-logger = logging.getLogger(__name__)
+# Returned when the LLM triage output is missing or unusable
+SAFE_TRIAGE = {
+    "severity": "moderate",
+    "advice": "Please consult with a healthcare provider.",
+    "needs_appointment": True,
+    "urgency": "routine",
+    "department": "General Medicine"
+}
+
+# Near-miss urgency values the model produces instead of the allowed ones
+_URGENCY_ALIASES = {"soon": "urgent", "asap": "immediate", "emergency": "immediate", "non-urgent": "routine"}
+
+
+def normalize_triage(raw: dict) -> dict:
+    """
+    Validate LLM triage output against TriageResponse
+
+    Enum-like fields are lowercased, common urgency synonyms are mapped and
+    a missing department (usual when no appointment is needed) defaults to
+    General Medicine.
+
+    Raises:
+        ValidationError: Output still does not match TriageResponse
+    """
+    triage = dict(raw)
+    for key in ("severity", "urgency"):
+        if isinstance(triage.get(key), str):
+            triage[key] = triage[key].strip().lower()
+    triage["urgency"] = _URGENCY_ALIASES.get(triage.get("urgency"), triage.get("urgency"))
+    if not triage.get("department"):
+        triage["department"] = SAFE_TRIAGE["department"]
+    return TriageResponse.model_validate(triage).model_dump()
 
 
 class GroqService:
     """Service for interacting with Groq API"""
     
     def __init__(self):
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        # The Groq client is created on first use so that importing the
+        # services (CLI scripts, appointment-only processes) needs no API key
+        self._client = None
+        self._client_lock = threading.Lock()
         self.stt_model = settings.STT_MODEL
         self.llm_model = settings.LLM_MODEL
         
         # TTS configuration
         self.elevenlabs_api_key = settings.ELEVENLABS_API_KEY
         self.elevenlabs_voice_id = "21m00Tcm4TlvDq8ikWAM"  # Rachel voice (warm, professional)
+
+    @property
+    def client(self):
+        """Groq client, constructed on first access"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    if not settings.GROQ_API_KEY:
+                        raise RuntimeError("GROQ_API_KEY is not configured")
+                    from groq import Groq
+                    self._client = Groq(api_key=settings.GROQ_API_KEY, base_url=settings.GROQ_BASE_URL)
+        return self._client
         
     async def transcribe_audio(self, audio_file) -> str:
         """
         Transcribe audio to text using Groq Whisper
         
         Args:
-            audio_file: Audio file object or path
+            audio_file: Audio file object, path or (filename, file object) tuple
             
         Returns:
             Transcribed text
         """
         try:
-            transcription = self.client.audio.transcriptions.create(
-                file=audio_file,
-                model=self.stt_model,
-                response_format="text"
-            )
+            # The Groq client is synchronous; keep it off the event loop so
+            # concurrent transcriptions actually overlap
+            with track_upstream("groq", "transcription"), span("stt", model=self.stt_model):
+                transcription = await asyncio.to_thread(
+                    self.client.audio.transcriptions.create,
+                    file=audio_file,
+                    model=self.stt_model,
+                    response_format="text"
+                )
             return transcription
         except Exception as e:
             logger.error(f"Error transcribing audio: {e}")
@@ -58,12 +113,16 @@ class GroqService:
             Generated text response
         """
         try:
-            chat_completion = self.client.chat.completions.create(
-                messages=messages,
-                model=self.llm_model,
-                temperature=temperature,
-                max_tokens=1024
-            )
+            with track_upstream("groq", "chat_completion"), span("llm", model=self.llm_model):
+                # Synchronous client: run it in a thread so the event loop keeps serving
+                chat_completion = await asyncio.to_thread(
+                    self.client.chat.completions.create,
+                    messages=messages,
+                    model=self.llm_model,
+                    temperature=temperature,
+                    max_tokens=1024
+                )
+            record_llm_usage(self.llm_model, getattr(chat_completion, "usage", None))
             return chat_completion.choices[0].message.content
         except Exception as e:
             logger.error(f"Error generating response: {e}")
@@ -79,37 +138,40 @@ class GroqService:
         Returns:
             Base64 encoded audio data
         """
+        import aiohttp
+
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.elevenlabs_voice_id}"
-
-                payload = {
-                    "text": text,
-                    "model_id": "eleven_flash_v2_5",  # Free tier model
-                    "voice_settings": {
-                        "stability": 0.5,
-                        "similarity_boost": 0.8,
-                        "style": 0.0,
-                        "use_speaker_boost": True
+            with track_upstream("elevenlabs", "text_to_speech"), span("tts", characters=len(text)):
+                async with aiohttp.ClientSession() as session:
+                    url = f"{settings.ELEVENLABS_BASE_URL}/v1/text-to-speech/{self.elevenlabs_voice_id}"
+
+                    payload = {
+                        "text": text,
+                        "model_id": "eleven_flash_v2_5",  # Free tier model
+                        "voice_settings": {
+                            "stability": 0.5,
+                            "similarity_boost": 0.8,
+                            "style": 0.0,
+                            "use_speaker_boost": True
+                        }
                     }
-                }
-
-                headers = {
-                    "Accept": "audio/mpeg",
-                    "Content-Type": "application/json",
-                    "xi-api-key": self.elevenlabs_api_key
-                }
-
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        audio_data = await response.read()
-                        logger.info(f"Audio data type: {type(audio_data)}, length: {len(audio_data)}")
-                        # Return raw audio bytes
-                        return audio_data
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"ElevenLabs TTS API error: {response.status} - {error_text}")
-                        raise Exception(f"TTS API error: {response.status}")
+
+                    headers = {
+                        "Accept": "audio/mpeg",
+                        "Content-Type": "application/json",
+                        "xi-api-key": self.elevenlabs_api_key
+                    }
+
+                    async with session.post(url, json=payload, headers=headers) as response:
+                        if response.status == 200:
+                            audio_data = await response.read()
+                            logger.info(f"Audio data type: {type(audio_data)}, length: {len(audio_data)}")
+                            # Return raw audio bytes
+                            return audio_data
+                        else:
+                            error_text = await response.text()
+                            logger.error(f"ElevenLabs TTS API error: {response.status} - {error_text}")
+                            raise Exception(f"TTS API error: {response.status}")
 
         except Exception as e:
             logger.error(f"Error generating speech: {e}")
@@ -123,7 +185,8 @@ class GroqService:
             symptoms: Patient's described symptoms
             
         Returns:
-            Dictionary with severity, advice, and recommendation
+            Dictionary with severity, advice, and recommendation, always
+            valid against TriageResponse
         """
         system_prompt = """You are a medical triage AI assistant for a hospital. 
 Your role is to:
@@ -148,19 +211,13 @@ Respond in JSON format:
         
         try:
             response = await self.generate_response(messages, temperature=0.3)
-            # Parse JSON response
-            import json
-            return json.loads(response)
+            return normalize_triage(json.loads(response))
+        except ValidationError as e:
+            logger.warning(f"Triage output did not match the schema, using safe default: {e}")
+            return dict(SAFE_TRIAGE)
         except Exception as e:
             logger.error(f"Error in symptom triage: {e}")
-            # Return safe default
-            return {
-                "severity": "moderate",
-                "advice": "Please consult with a healthcare provider.",
-                "needs_appointment": True,
-                "urgency": "routine",
-                "department": "General Medicine"
-            }
+            return dict(SAFE_TRIAGE)
     
     async def generate_conversation_response(self, conversation_history: list) -> str:
         """
@@ -0,0 +1,205 @@
+"""
+Group-commit writer for appointment mutations
+"""
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+import asyncio
+import queue
+import threading
+import time
+import logging
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Appointment, AppointmentStatus
+from .appointment_service import AppointmentService
+from .response_cache import response_cache
+from .event_bus import event_bus
+from .stats_service import stats_service
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Mutation:
+    """One caller's create or update, waiting to be committed"""
+    kind: str  # "create" or "update"
+    data: dict
+    appointment_id: Optional[int] = None
+    future: Future = field(default_factory=Future)
+
+
+class GroupCommitWriter:
+    """
+    Commits concurrent appointment writes together
+
+    Mutations are handed to a single writer thread, which waits up to
+    `window_ms` for more to arrive and then applies up to `max_batch` of
+    them in one transaction: creates as one multi-row INSERT ... RETURNING
+    (so ids and defaults come back without a refresh), updates against
+    rows loaded with one SELECT, and a single netted statistics delta.
+    One commit (one fsync on SQLite) then covers the whole batch.
+
+    Each caller gets its own result. A missing appointment fails only
+    that caller; if the batch transaction itself fails, every mutation is
+    retried on its own so one bad write can't fail its neighbours.
+    """
+
+    def __init__(self, session_factory: Callable[..., Session], window_ms: float = 2.0, max_batch: int = 64):
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.mutations = 0
+        self._queue: "queue.SimpleQueue[Optional[_Mutation]]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _submit(self, mutation: _Mutation) -> Future:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+                    self._thread.start()
+        self._queue.put(mutation)
+        return mutation.future
+
+    async def create(self, appointment_data: dict) -> Appointment:
+        """Create an appointment in the next batch"""
+        return await asyncio.wrap_future(self._submit(_Mutation("create", appointment_data)))
+
+    async def update(self, appointment_id: int, update_data: dict) -> Appointment:
+        """
+        Update an appointment in the next batch
+
+        Raises:
+            ValueError: Appointment not found
+        """
+        return await asyncio.wrap_future(
+            self._submit(_Mutation("update", update_data, appointment_id=appointment_id))
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Commit whatever is queued and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            stopping = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    mutation = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if mutation is None:
+                    stopping = True
+                    break
+                batch.append(mutation)
+
+            self._commit_batch(batch)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch: list[_Mutation]):
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            outcomes, events = self._apply(db, batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            db.close()
+            if len(batch) > 1:
+                logger.warning(f"Group commit of {len(batch)} writes failed ({e}), retrying individually")
+                for mutation in batch:
+                    self._commit_batch([mutation])
+            else:
+                logger.error(f"Error writing appointment: {e}")
+                batch[0].future.set_exception(e)
+            return
+        db.close()
+
+        self.batches += 1
+        self.mutations += len(batch)
+        if events:
+            response_cache.invalidate()
+        if events:
+            event_bus.publish_many([
+                (event_type, appointment.id, AppointmentService._event_summary(appointment))
+                for event_type, appointment in events
+            ])
+        for mutation, outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                mutation.future.set_exception(outcome)
+            else:
+                mutation.future.set_result(outcome)
+
+    @staticmethod
+    def _apply(db: Session, batch: list[_Mutation]) -> tuple[list, list]:
+        """Apply a batch inside the session's transaction; returns per-mutation outcomes and events"""
+        outcomes: list = [None] * len(batch)
+        events = []
+        stats_before, stats_after = Counter(), Counter()
+
+        creates = [index for index, mutation in enumerate(batch) if mutation.kind == "create"]
+        if creates:
+            created = db.scalars(
+                insert(Appointment).returning(Appointment, sort_by_parameter_order=True),
+                [batch[index].data for index in creates]
+            ).all()
+            for index, appointment in zip(creates, created):
+                outcomes[index] = appointment
+                stats_after.update(stats_service.dimension_keys(appointment))
+                events.append(("created", appointment))
+
+        updates = [index for index, mutation in enumerate(batch) if mutation.kind == "update"]
+        if updates:
+            ids = {batch[index].appointment_id for index in updates}
+            current = {
+                appointment.id: appointment
+                for appointment in db.scalars(select(Appointment).where(Appointment.id.in_(ids)))
+            }
+            for index in updates:
+                mutation = batch[index]
+                appointment = current.get(mutation.appointment_id)
+                if appointment is None:
+                    outcomes[index] = ValueError(f"Appointment {mutation.appointment_id} not found")
+                    continue
+                stats_before.update(stats_service.dimension_keys(appointment))
+                for key, value in mutation.data.items():
+                    if hasattr(appointment, key):
+                        setattr(appointment, key, value)
+                # Set explicitly so the flushed row needs no refresh to read it back
+                appointment.updated_at = datetime.utcnow()
+                stats_after.update(stats_service.dimension_keys(appointment))
+                outcomes[index] = appointment
+                cancelled = mutation.data.get("status") == AppointmentStatus.CANCELLED
+                events.append(("cancelled" if cancelled else "updated", appointment))
+            db.flush()
+
+        stats_service.apply_delta(db, stats_before, stats_after)
+        return outcomes, events
+
+
+# Global instance
+appointment_writer = GroupCommitWriter(
+    SessionLocal,
+    window_ms=settings.GROUP_COMMIT_WINDOW_MS,
+    max_batch=settings.GROUP_COMMIT_MAX_BATCH
+)
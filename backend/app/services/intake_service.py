@@ -0,0 +1,135 @@
+"""
+Triage-to-booking pipeline for patient intake
+"""
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import asyncio
+import json
+import logging
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import AppointmentType
+from .appointment_service import appointment_service
+from .groq_service import groq_service
+
+logger = logging.getLogger(__name__)
+
+# How many days ahead each triage urgency should be seen within
+URGENCY_WINDOW_DAYS = {"immediate": 1, "urgent": 2, "routine": 7}
+
+
+class IntakeService:
+    """Service that triages symptoms and books the earliest suitable slot"""
+
+    @staticmethod
+    def _load_existing(start: datetime, end: datetime) -> list:
+        """Load busy appointments for the booking horizon in a separate session"""
+        db = SessionLocal()
+        try:
+            appointments = appointment_service.get_active_appointments_between(db, start, end)
+            # Detach the rows so they can be read after this session closes
+            db.expunge_all()
+            return appointments
+        finally:
+            db.close()
+
+    @staticmethod
+    def candidate_slots(
+        existing: list,
+        earliest: datetime,
+        urgency: str,
+        department: str,
+        duration_minutes: int
+    ) -> list:
+        """
+        Order free slots by preference for a triage result
+
+        Slots inside the urgency window come first; if that window is full
+        the rest of the booking horizon is used.
+        """
+        first_day = earliest.replace(hour=0, minute=0, second=0, microsecond=0)
+        window = URGENCY_WINDOW_DAYS.get(urgency, settings.TRIAGE_BOOKING_HORIZON_DAYS)
+        slots = []
+        for offset in range(settings.TRIAGE_BOOKING_HORIZON_DAYS):
+            day = first_day + timedelta(days=offset)
+            day_slots = appointment_service.compute_free_slots(existing, day, duration_minutes, department)
+            slots.extend(slot for slot in day_slots if slot >= earliest)
+            if offset + 1 >= window and slots:
+                break
+        return slots
+
+    async def triage_and_book(self, db: Session, intake: dict) -> dict:
+        """
+        Triage symptoms and book an appointment in one step
+
+        The LLM triage call and the availability query run concurrently;
+        the slot is then chosen from the triage urgency and department and
+        booked with the triage output stored on the appointment.
+
+        Args:
+            db: Database session used for the booking
+            intake: symptoms, patient_name, patient_phone, patient_email, earliest_date
+
+        Returns:
+            Dictionary with triage, booked, appointment and message
+        """
+        earliest = intake.get("earliest_date") or datetime.utcnow()
+        horizon_start = earliest.replace(hour=0, minute=0, second=0, microsecond=0)
+        horizon_end = horizon_start + timedelta(days=settings.TRIAGE_BOOKING_HORIZON_DAYS)
+
+        triage, existing = await asyncio.gather(
+            groq_service.triage_symptoms(intake["symptoms"]),
+            asyncio.to_thread(self._load_existing, horizon_start, horizon_end)
+        )
+
+        if not triage.get("needs_appointment"):
+            return {
+                "triage": triage,
+                "booked": False,
+                "appointment": None,
+                "message": "No appointment needed based on the triage assessment"
+            }
+
+        duration = settings.APPOINTMENT_DURATION_MINUTES
+        department = triage.get("department") or None
+        slots = self.candidate_slots(existing, earliest, triage.get("urgency"), department, duration)
+
+        is_emergency = triage.get("severity") == "emergency" or triage.get("urgency") == "immediate"
+        # Waits for the database write lock, so keep it off the event loop
+        appointment = await asyncio.to_thread(
+            appointment_service.book_first_available,
+            db,
+            {
+                "patient_name": intake["patient_name"],
+                "patient_phone": intake["patient_phone"],
+                "patient_email": intake.get("patient_email"),
+                "symptoms": intake["symptoms"],
+                "department": department,
+                "appointment_type": AppointmentType.EMERGENCY if is_emergency else AppointmentType.GENERAL,
+                "triage_notes": json.dumps(triage),
+                "ai_recommendation": triage.get("advice")
+            },
+            slots,
+            duration
+        )
+
+        if appointment is None:
+            logger.warning(f"No free slot for {department} within {settings.TRIAGE_BOOKING_HORIZON_DAYS} days")
+            return {
+                "triage": triage,
+                "booked": False,
+                "appointment": None,
+                "message": f"No available slot in the next {settings.TRIAGE_BOOKING_HORIZON_DAYS} days"
+            }
+
+        return {
+            "triage": triage,
+            "booked": True,
+            "appointment": appointment,
+            "message": f"Booked {department or 'appointment'} on {appointment.appointment_date.isoformat()}"
+        }
+
+
+# Global instance
+intake_service = IntakeService()
@@ -0,0 +1,471 @@
+"""
+In-process background job queue for slow AI work
+"""
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import logging
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Any]]
+JobCleanup = Callable[[dict], None]
+
+_STORE_POLL_SECONDS = 0.5  # How often the store is checked for jobs of other workers
+
+
+class JobQueueFull(Exception):
+    """Raised when the queue is at its maximum depth"""
+
+
+@dataclass
+class Job:
+    """A unit of background work and its outcome"""
+    id: str
+    kind: str
+    payload: dict
+    status: str = "queued"  # queued, running, succeeded, failed, cancelled
+    result: Any = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+def _process_alive(pid: int) -> bool:
+    """Whether a process with this id is running on this host"""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    SQLite persistence so queued jobs survive restarts and results are shared across workers
+
+    Each row records the id of the process that owns the job. Unfinished
+    jobs are only taken over once that process is gone, so sibling workers
+    sharing the store never run each other's jobs. A cancel handled by
+    another worker is recorded in the row for the owner to act on.
+    """
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    owner INTEGER,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0
+                )"""
+            )
+            columns = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                # Stores created before jobs had owners
+                self._connection.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+            if "cancel_requested" not in columns:
+                self._connection.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+
+    def save(self, job: Job):
+        with self._lock, self._connection:
+            # Upsert rather than replace, so a pending cancel request survives
+            self._connection.execute(
+                """INSERT INTO jobs (id, kind, payload, status, result, error, created_at, started_at, finished_at, owner)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    kind = excluded.kind, payload = excluded.payload, status = excluded.status,
+                    result = excluded.result, error = excluded.error, created_at = excluded.created_at,
+                    started_at = excluded.started_at, finished_at = excluded.finished_at, owner = excluded.owner""",
+                (
+                    job.id, job.kind, json.dumps(job.payload), job.status,
+                    json.dumps(job.result, default=str), job.error,
+                    job.created_at.isoformat(),
+                    job.started_at.isoformat() if job.started_at else None,
+                    job.finished_at.isoformat() if job.finished_at else None,
+                    os.getpid()
+                )
+            )
+
+    @staticmethod
+    def _from_row(row) -> Job:
+        return Job(
+            id=row[0], kind=row[1], payload=json.loads(row[2]), status=row[3],
+            result=json.loads(row[4]) if row[4] else None, error=row[5],
+            created_at=datetime.fromisoformat(row[6]),
+            started_at=datetime.fromisoformat(row[7]) if row[7] else None,
+            finished_at=datetime.fromisoformat(row[8]) if row[8] else None
+        )
+
+    def load(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._from_row(row) if row else None
+
+    def request_cancel(self, job_id: str) -> Optional[Job]:
+        """Ask the owning worker to cancel an unfinished job"""
+        with self._lock, self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                (job_id,)
+            )
+        return self.load(job_id)
+
+    def cancel_requests(self) -> list[str]:
+        """Ids of this process's unfinished jobs that another worker asked to cancel"""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id FROM jobs WHERE owner = ? AND cancel_requested = 1 AND status IN ('queued', 'running')",
+                (os.getpid(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def claim_orphaned(self) -> list[Job]:
+        """
+        Take over unfinished jobs whose owning process has exited
+
+        The owner is swapped with a compare-and-set, so when several workers
+        start at once each orphaned job is claimed by exactly one of them.
+        """
+        pid = os.getpid()
+        claimed = []
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY created_at"
+            ).fetchall()
+            for row in rows:
+                owner = row[9]
+                if owner is not None and _process_alive(owner):
+                    continue
+                with self._connection:
+                    cursor = self._connection.execute(
+                        "UPDATE jobs SET owner = ?, status = 'queued' WHERE id = ? AND owner IS ?",
+                        (pid, row[0], owner)
+                    )
+                if cursor.rowcount == 1:
+                    claimed.append(self._from_row(row))
+        return claimed
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class JobQueue:
+    """
+    Bounded queue with a fixed pool of asyncio workers
+
+    Handlers are registered per job kind and receive the job payload.
+    Finished jobs are kept in memory (most recent `max_retained`) for
+    polling; with a store configured they are also persisted, which lets
+    any worker process answer a status request, long-poll or cancel a job,
+    and re-queues the jobs of a worker process that exited.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_depth: int = 100,
+        max_retained: int = 1000,
+        store: Optional[JobStore] = None
+    ):
+        self.worker_count = workers
+        self.max_depth = max_depth
+        self.max_retained = max_retained
+        self.store = store
+        self._handlers: dict[str, JobHandler] = {}
+        self._cleanups: dict[str, JobCleanup] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._done_events: dict[str, asyncio.Event] = {}
+        self._running: dict[str, tuple[asyncio.Task, float]] = {}
+        self._cancel_requested: set[str] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._cancel_watcher: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._busy_seconds = 0.0
+        self._started_at = time.monotonic()
+        self._counts = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+
+    def register(self, kind: str, handler: JobHandler, cleanup: Optional[JobCleanup] = None):
+        """
+        Register the coroutine that runs jobs of a kind
+
+        Args:
+            kind: Job kind
+            handler: Coroutine function taking the payload
+            cleanup: Releases payload resources (e.g. temp files) when a job
+                is cancelled before its handler ran
+        """
+        self._handlers[kind] = handler
+        if cleanup is not None:
+            self._cleanups[kind] = cleanup
+
+    async def start(self):
+        """Start the worker pool (and resume jobs left by exited workers)"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._stopping = False
+        self._started_at = time.monotonic()
+        if self.store:
+            for job in self.store.claim_orphaned():
+                job.status = "queued"
+                self._track(job)
+                self._queue.put_nowait(job.id)
+            if self._queue.qsize():
+                logger.info(f"Resumed {self._queue.qsize()} persisted jobs")
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        if self.store:
+            self._cancel_watcher = asyncio.create_task(self._watch_cancel_requests())
+        logger.info(f"Job queue started with {self.worker_count} workers")
+
+    async def stop(self, timeout: float = 0.0):
+        """
+        Stop the workers
+
+        Running jobs get up to `timeout` seconds to finish; whatever is still
+        running after that is cancelled (and re-queued on restart if persisted).
+        """
+        self._stopping = True
+        running = [task for task, _ in self._running.values()]
+        if running and timeout > 0:
+            logger.info(f"Waiting up to {timeout:.0f}s for {len(running)} running jobs")
+            await asyncio.wait(running, timeout=timeout)
+        if self._cancel_watcher is not None:
+            self._cancel_watcher.cancel()
+            self._cancel_watcher = None
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def _track(self, job: Job):
+        self._jobs[job.id] = job
+        self._done_events.setdefault(job.id, asyncio.Event())
+        # Forget the oldest finished jobs beyond the retention limit
+        while len(self._jobs) > self.max_retained:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.finished:
+                break
+            del self._jobs[oldest_id]
+            self._done_events.pop(oldest_id, None)
+
+    def _save(self, job: Job):
+        if self.store:
+            self.store.save(job)
+
+    def submit(self, kind: str, payload: dict) -> Job:
+        """
+        Queue a job
+
+        Args:
+            kind: Registered job kind
+            payload: JSON-serializable handler input
+
+        Returns:
+            Queued job
+
+        Raises:
+            ValueError: Unknown job kind
+            JobQueueFull: Queue is at maximum depth
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not started")
+        if self._queue.qsize() >= self.max_depth:
+            raise JobQueueFull(f"Job queue is full ({self.max_depth} jobs waiting)")
+
+        job = Job(id=uuid.uuid4().hex, kind=kind, payload=payload)
+        self._track(job)
+        self._save(job)
+        self._queue.put_nowait(job.id)
+        self._counts["submitted"] += 1
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id (in memory first, then the store)"""
+        job = self._jobs.get(job_id)
+        if job is None and self.store:
+            job = self.store.load(job_id)
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Long-poll: wait up to `timeout` seconds for a job to finish"""
+        job = self.get(job_id)
+        if job is None or job.finished or timeout <= 0:
+            return job
+        event = self._done_events.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            return self.get(job_id)
+
+        # Another worker owns the job: poll the store
+        deadline = time.monotonic() + timeout
+        while not job.finished:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(_STORE_POLL_SECONDS, remaining))
+            job = self.get(job_id) or job
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job
+
+        A job owned by another worker is flagged in the store and returned
+        as it is; the owner cancels it within _STORE_POLL_SECONDS.
+        """
+        job = self._jobs.get(job_id)
+        if job is None and self.store:
+            return self.store.request_cancel(job_id)
+        if job is None or job.finished:
+            return job
+        running = self._running.get(job_id)
+        if running is not None:
+            self._cancel_requested.add(job_id)
+            running[0].cancel()
+        else:
+            self._finish(job, "cancelled")
+            cleanup = self._cleanups.get(job.kind)
+            if cleanup is not None:
+                try:
+                    cleanup(job.payload)
+                except Exception as e:
+                    logger.warning(f"Cleanup of cancelled job {job_id} failed: {e}")
+        return job
+
+    async def _watch_cancel_requests(self):
+        """Cancel this worker's jobs when another worker records a cancel request"""
+        while True:
+            await asyncio.sleep(_STORE_POLL_SECONDS)
+            try:
+                job_ids = await asyncio.to_thread(self.store.cancel_requests)
+            except Exception as e:
+                logger.warning(f"Error reading job cancel requests: {e}")
+                continue
+            for job_id in job_ids:
+                if job_id in self._jobs and job_id not in self._cancel_requested:
+                    self.cancel(job_id)
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None):
+        job.status = status
+        job.result = result
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        self._counts[status] += 1
+        self._save(job)
+        event = self._done_events.get(job.id)
+        if event:
+            event.set()
+
+    async def _worker(self, index: int):
+        # Workers finish their current job but take no new ones once stopping
+        while not self._stopping:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                continue
+
+            job.status = "running"
+            job.started_at = datetime.utcnow()
+            self._save(job)
+            started = time.monotonic()
+            task = asyncio.create_task(self._handlers[job.kind](job.payload))
+            self._running[job_id] = (task, started)
+            try:
+                result = await task
+                self._finish(job, "succeeded", result=result)
+            except asyncio.CancelledError:
+                if job_id not in self._cancel_requested:
+                    # The worker itself is being stopped
+                    task.cancel()
+                    raise
+                self._finish(job, "cancelled")
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job.kind}) failed: {e}")
+                self._finish(job, "failed", error=str(e))
+            finally:
+                self._running.pop(job_id, None)
+                self._cancel_requested.discard(job_id)
+                self._busy_seconds += time.monotonic() - started
+
+    def stats(self) -> dict:
+        """Queue depth, worker utilization and job counts"""
+        now = time.monotonic()
+        elapsed = max(now - self._started_at, 1e-9)
+        busy_seconds = self._busy_seconds + sum(now - started for _, started in self._running.values())
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_depth": self.max_depth,
+            "workers": self.worker_count,
+            "busy_workers": len(self._running),
+            "utilization": round(busy_seconds / (elapsed * self.worker_count), 4),
+            "jobs": dict(self._counts)
+        }
+
+
+# Global instance
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    max_depth=settings.JOB_QUEUE_MAX_DEPTH,
+    store=JobStore(settings.JOB_STORE_PATH) if settings.JOB_STORE_PATH else None
+)
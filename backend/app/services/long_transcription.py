@@ -0,0 +1,283 @@
+"""
+Chunked transcription for long recordings
+"""
+from dataclasses import dataclass
+from typing import AsyncIterator, BinaryIO, Optional, Union
+import asyncio
+import io
+import os
+import re
+import wave
+import logging
+
+import numpy as np
+
+from ..config import settings
+from .audio_preprocessing import audio_preprocessor
+from .groq_service import groq_service
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[^\w']+")
+_MAX_OVERLAP_WORDS = 12
+_SCAN_BLOCK_SECONDS = 10
+
+
+@dataclass
+class WavInfo:
+    """Header of a PCM WAV file"""
+    channels: int
+    sample_width: int
+    sample_rate: int
+    frames: int
+
+
+@dataclass
+class AudioSegment:
+    """A slice of a recording, in sample frames of the original file"""
+    index: int
+    start: int
+    end: int
+    overlaps_previous: bool
+
+
+def _text_of(transcription) -> str:
+    """Get plain text from an STT result (str or SDK response object)"""
+    return str(getattr(transcription, "text", transcription)).strip()
+
+
+def _normalize(word: str) -> str:
+    return _WORD_RE.sub("", word.lower())
+
+
+def stitch_transcripts(texts: list[str], overlaps: list[bool]) -> str:
+    """
+    Join segment transcripts in order, dropping words repeated across overlaps
+
+    Segments cut at silence do not overlap and are joined as-is. For hard
+    cuts the next segment starts slightly before the previous one ended,
+    so the longest run of words ending the previous text and starting the
+    next one is removed from the next one.
+
+    Args:
+        texts: Transcript for each segment, in order
+        overlaps: Whether each segment overlaps the previous one
+
+    Returns:
+        Combined transcript
+    """
+    words: list[str] = []
+    for text, overlaps_previous in zip(texts, overlaps):
+        segment_words = text.split()
+        if overlaps_previous and words:
+            tail = [_normalize(w) for w in words[-_MAX_OVERLAP_WORDS:]]
+            head = [_normalize(w) for w in segment_words[:_MAX_OVERLAP_WORDS]]
+            for size in range(min(len(tail), len(head)), 0, -1):
+                if tail[-size:] == head[:size]:
+                    segment_words = segment_words[size:]
+                    break
+        words.extend(segment_words)
+    return " ".join(words)
+
+
+class LongAudioTranscriber:
+    """
+    Split long recordings at silence and transcribe segments concurrently
+
+    Latency then scales with the longest segment instead of the whole
+    recording, and each upstream request stays well under the STT file
+    size limit.
+    """
+
+    def __init__(
+        self,
+        max_segment_seconds: float = 30.0,
+        min_segment_seconds: float = 5.0,
+        min_silence_ms: int = 300,
+        overlap_ms: int = 500,
+        max_parallel: int = 4
+    ):
+        if overlap_ms >= max_segment_seconds * 1000:
+            # Hard cuts would never move forward
+            raise ValueError(
+                f"overlap_ms ({overlap_ms}) must be shorter than max_segment_seconds ({max_segment_seconds})"
+            )
+        self.max_segment_seconds = max_segment_seconds
+        self.min_segment_seconds = min_segment_seconds
+        self.min_silence_ms = min_silence_ms
+        self.overlap_ms = overlap_ms
+        self.max_parallel = max_parallel
+
+    def split(self, samples: np.ndarray, sample_rate: int) -> list[AudioSegment]:
+        """Compute segment boundaries for mono samples already in memory"""
+        energy_db, frame_size = audio_preprocessor.frame_energy_db(samples, sample_rate)
+        return self.split_energy(energy_db, frame_size, len(samples), sample_rate)
+
+    def split_energy(
+        self,
+        energy_db: np.ndarray,
+        frame_size: int,
+        total: int,
+        sample_rate: int
+    ) -> list[AudioSegment]:
+        """
+        Compute segment boundaries from per-frame energy
+
+        Cuts are placed in the middle of the latest silent stretch that
+        keeps a segment under the maximum length; if there is none, the
+        segment is hard-cut and the next one overlaps it.
+        """
+        silent = energy_db <= audio_preprocessor.silence_threshold_db
+
+        # Midpoints (in samples) of silent runs long enough to cut at
+        min_frames = max(self.min_silence_ms * sample_rate // 1000 // frame_size, 1)
+        edges = np.diff(np.concatenate(([0], silent.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_ends = np.flatnonzero(edges == -1)
+        long_runs = (run_ends - run_starts) >= min_frames
+        cut_points = ((run_starts[long_runs] + run_ends[long_runs]) // 2) * frame_size
+
+        max_len = int(self.max_segment_seconds * sample_rate)
+        min_len = int(self.min_segment_seconds * sample_rate)
+        overlap = int(self.overlap_ms * sample_rate / 1000)
+
+        segments = []
+        start = 0
+        overlaps_previous = False
+        while start < total:
+            if total - start <= max_len:
+                segments.append(AudioSegment(len(segments), start, total, overlaps_previous))
+                break
+            limit = start + max_len
+            candidates = cut_points[(cut_points > start + min_len) & (cut_points <= limit)]
+            if len(candidates):
+                end = int(candidates[-1])
+                segments.append(AudioSegment(len(segments), start, end, overlaps_previous))
+                start, overlaps_previous = end, False
+            else:
+                segments.append(AudioSegment(len(segments), start, limit, overlaps_previous))
+                # Always advance, even if rounding makes the overlap a whole segment
+                start, overlaps_previous = max(limit - overlap, start + 1), True
+        return segments
+
+    @staticmethod
+    def wav_info(source: Union[str, BinaryIO]) -> Optional[WavInfo]:
+        """Read a WAV header (path or file object), or None if not supported PCM WAV"""
+        try:
+            with wave.open(source, "rb") as wav_file:
+                info = WavInfo(
+                    wav_file.getnchannels(),
+                    wav_file.getsampwidth(),
+                    wav_file.getframerate(),
+                    wav_file.getnframes()
+                )
+        except (wave.Error, EOFError):
+            return None
+        if audio_preprocessor.decode_frames(b"", info.sample_width, info.channels) is None:
+            return None
+        return info
+
+    @staticmethod
+    def _scan_energy(path: str, info: WavInfo) -> tuple[np.ndarray, int]:
+        """Per-frame energy of the whole file, decoded a block at a time"""
+        frame_size = max(info.sample_rate * 20 // 1000, 1)
+        block_frames = frame_size * (_SCAN_BLOCK_SECONDS * 1000 // 20)
+        energies = []
+        with wave.open(path, "rb") as wav_file:
+            while True:
+                frames = wav_file.readframes(block_frames)
+                if not frames:
+                    break
+                samples = audio_preprocessor.decode_frames(frames, info.sample_width, info.channels)
+                mono = samples.mean(axis=1)
+                energy_db, _ = audio_preprocessor.frame_energy_db(mono, info.sample_rate)
+                energies.append(energy_db)
+        return (np.concatenate(energies) if energies else np.zeros(0)), frame_size
+
+    @staticmethod
+    def _encode_segment(path: str, info: WavInfo, segment: AudioSegment) -> bytes:
+        """Decode just one segment from disk and encode it as 16kHz mono WAV"""
+        with wave.open(path, "rb") as wav_file:
+            wav_file.setpos(segment.start)
+            frames = wav_file.readframes(segment.end - segment.start)
+        samples = audio_preprocessor.decode_frames(frames, info.sample_width, info.channels)
+        mono, output_rate = audio_preprocessor.to_mono(samples, info.sample_rate)
+        return audio_preprocessor.encode_wav(mono, output_rate)
+
+    async def transcribe_stream(self, path: str, filename: str = "audio.wav") -> AsyncIterator[dict]:
+        """
+        Transcribe a recording on disk, yielding progress events as segments finish
+
+        Yields dictionaries of type ``started``, ``segment`` (in completion
+        order) and finally ``complete`` with the stitched transcript.
+        The file is never loaded whole: silence is found in one streaming
+        pass and each segment is decoded only when it is transcribed, so
+        memory stays bounded by ``max_parallel`` segments. Non-WAV input
+        cannot be split and is sent as a single request straight from the
+        file, so it must fit the STT upload limit.
+
+        Raises:
+            ValueError: Non-WAV input larger than MAX_AUDIO_UPLOAD_BYTES
+        """
+        info = await asyncio.to_thread(self.wav_info, path)
+        if info is None:
+            if os.path.getsize(path) > settings.MAX_AUDIO_UPLOAD_BYTES:
+                raise ValueError(
+                    f"Only PCM WAV recordings can be split; other formats are limited to "
+                    f"{settings.MAX_AUDIO_UPLOAD_BYTES} bytes"
+                )
+            yield {"type": "started", "segments": 1}
+            with open(path, "rb") as audio:
+                text = _text_of(await groq_service.transcribe_audio((filename, audio)))
+            yield {"type": "segment", "index": 0, "completed": 1, "total": 1, "text": text}
+            yield {"type": "complete", "transcription": text, "segments": 1}
+            return
+
+        sample_rate = info.sample_rate
+        energy_db, frame_size = await asyncio.to_thread(self._scan_energy, path, info)
+        segments = self.split_energy(energy_db, frame_size, info.frames, sample_rate)
+        yield {
+            "type": "started",
+            "segments": len(segments),
+            "duration_seconds": round(info.frames / sample_rate, 3)
+        }
+
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        async def transcribe_segment(segment: AudioSegment) -> tuple[AudioSegment, str]:
+            async with semaphore:
+                wav = await asyncio.to_thread(self._encode_segment, path, info, segment)
+                text = await groq_service.transcribe_audio(
+                    (f"segment_{segment.index}.wav", io.BytesIO(wav))
+                )
+                return segment, _text_of(text)
+
+        tasks = [asyncio.create_task(transcribe_segment(segment)) for segment in segments]
+        texts: list[Optional[str]] = [None] * len(segments)
+        try:
+            for completed, task in enumerate(asyncio.as_completed(tasks), start=1):
+                segment, text = await task
+                texts[segment.index] = text
+                yield {
+                    "type": "segment",
+                    "index": segment.index,
+                    "completed": completed,
+                    "total": len(segments),
+                    "start_seconds": round(segment.start / sample_rate, 3),
+                    "end_seconds": round(segment.end / sample_rate, 3),
+                    "text": text
+                }
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        transcription = stitch_transcripts(texts, [s.overlaps_previous for s in segments])
+        logger.info(f"Transcribed {len(segments)} segments ({info.frames / sample_rate:.1f}s of audio)")
+        yield {"type": "complete", "transcription": transcription, "segments": len(segments)}
+
+
+# Global instance
+long_audio_transcriber = LongAudioTranscriber(
+    max_segment_seconds=settings.LONG_AUDIO_SEGMENT_SECONDS,
+    max_parallel=settings.LONG_AUDIO_MAX_PARALLEL
+)
@@ -0,0 +1,289 @@
+"""
+Bulk rescheduling for doctor absences and department closures
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+import logging
+import time
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Appointment, AppointmentStatus, AppointmentType
+from .response_cache import response_cache
+from .event_bus import event_bus
+from .stats_service import stats_service
+
+logger = logging.getLogger(__name__)
+
+# Lower sorts first: emergencies are placed before everyone else
+TYPE_PRIORITY = {
+    AppointmentType.EMERGENCY: 0,
+    AppointmentType.FOLLOW_UP: 1,
+    AppointmentType.CONSULTATION: 2,
+    AppointmentType.GENERAL: 3,
+}
+
+
+class _SlotPlanner:
+    """
+    Free working-hours slots per lane, built from one scan of the window
+
+    A lane is ("doctor", name) for a specific doctor, or ("department", name)
+    for appointments without a doctor. ("department", None) holds every
+    appointment, like compute_free_slots without a department filter. Each
+    lane keeps a sorted list of free slot start times so the earliest free
+    slot at or after a given time is a bisect away.
+    """
+
+    def __init__(self, start: datetime, days: int, duration_minutes: int, busy_rows: list):
+        self.duration = timedelta(minutes=duration_minutes)
+        self.per_day = (settings.WORKING_HOURS_END - settings.WORKING_HOURS_START) * 60 // duration_minutes
+        now = datetime.utcnow()
+        self.grid = [
+            slot
+            for day in range(days)
+            for slot in self._day_slots(start + timedelta(days=day))
+            if slot > now
+        ]
+        self.occupied = defaultdict(set)
+        for appointment_date, department, doctor_name in busy_rows:
+            for slot in self._overlapping(appointment_date):
+                for lane in self._lanes_for(department, doctor_name):
+                    self.occupied[lane].add(slot)
+        self.free: dict = {}
+
+    def _day_slots(self, day: datetime) -> list:
+        first = day.replace(hour=settings.WORKING_HOURS_START, minute=0, second=0, microsecond=0)
+        return [first + self.duration * index for index in range(self.per_day)]
+
+    def _overlapping(self, appointment_date: datetime) -> list:
+        """Grid slots that overlap an appointment starting at appointment_date"""
+        first = appointment_date.replace(hour=settings.WORKING_HOURS_START, minute=0, second=0, microsecond=0)
+        index, remainder = divmod(appointment_date - first, self.duration)
+        indexes = (index, index + 1) if remainder else (index,)
+        return [first + self.duration * i for i in indexes if 0 <= i < self.per_day]
+
+    @staticmethod
+    def _lanes_for(department: Optional[str], doctor_name: Optional[str]) -> list:
+        lanes = [("department", None)]
+        if department:
+            lanes.append(("department", department))
+        if doctor_name:
+            lanes.append(("doctor", doctor_name))
+        return lanes
+
+    def _free_slots(self, lane: tuple) -> list:
+        if lane not in self.free:
+            occupied = self.occupied.get(lane, ())
+            self.free[lane] = [slot for slot in self.grid if slot not in occupied]
+        return self.free[lane]
+
+    def earliest(self, lane: tuple, not_before: datetime) -> Optional[datetime]:
+        """Earliest free slot in a lane at or after not_before"""
+        slots = self._free_slots(lane)
+        index = bisect_left(slots, not_before)
+        return slots[index] if index < len(slots) else None
+
+    def take(self, slot: datetime, department: Optional[str], doctor_name: Optional[str]):
+        """Mark a slot as used in every lane an appointment there occupies"""
+        for lane in self._lanes_for(department, doctor_name):
+            slots = self._free_slots(lane)
+            index = bisect_left(slots, slot)
+            if index < len(slots) and slots[index] == slot:
+                slots.pop(index)
+
+
+class RescheduleService:
+    """Service for moving every appointment affected by an absence in one pass"""
+
+    @staticmethod
+    def bulk_reschedule(
+        db: Session,
+        date: datetime,
+        doctor_name: Optional[str] = None,
+        department: Optional[str] = None,
+        horizon_days: int = 7,
+        replacement_doctor: Optional[str] = None,
+        dry_run: bool = False
+    ) -> dict:
+        """
+        Reassign all active appointments of a doctor and/or department on a day
+
+        Affected appointments are placed in priority order (EMERGENCY first,
+        then by original time) into the earliest free slot among:
+
+        - another doctor seen in the same department (or replacement_doctor)
+          on the same day, no earlier than the original time, when a doctor
+          is absent
+        - the same doctor or department on the following `horizon_days` days
+
+        The plan is computed in memory from one query over the window and
+        applied as a single bulk UPDATE with the statistics delta in the same
+        transaction. Appointments with no free slot in the window are left
+        unchanged and reported as unassigned.
+
+        Args:
+            db: Database session
+            date: Day of the absence
+            doctor_name: Absent doctor
+            department: Closed department, or restricts doctor_name to one department
+            horizon_days: How many following days to search for free slots
+            replacement_doctor: Extra doctor available to take over
+            dry_run: Compute and return the plan without writing it
+
+        Returns:
+            Diff with moved and unassigned appointments
+        """
+        started = time.perf_counter()
+        if not doctor_name and not department:
+            raise ValueError("doctor_name or department is required")
+
+        day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+        next_day = day_start + timedelta(days=1)
+        window_end = next_day + timedelta(days=horizon_days)
+        duration = settings.APPOINTMENT_DURATION_MINUTES
+
+        query = select(Appointment).where(
+            Appointment.appointment_date >= day_start,
+            Appointment.appointment_date < next_day,
+            Appointment.status.notin_([AppointmentStatus.CANCELLED, AppointmentStatus.COMPLETED])
+        )
+        if doctor_name:
+            query = query.where(Appointment.doctor_name == doctor_name)
+        if department:
+            query = query.where(Appointment.department == department)
+        affected = db.scalars(query).all()
+        affected_ids = {appointment.id for appointment in affected}
+
+        # Everything else booked in the window, as plain tuples
+        window_rows = db.execute(
+            select(
+                Appointment.id,
+                Appointment.appointment_date,
+                Appointment.department,
+                Appointment.doctor_name
+            ).where(
+                Appointment.appointment_date >= day_start - timedelta(minutes=duration),
+                Appointment.appointment_date < window_end,
+                Appointment.status != AppointmentStatus.CANCELLED
+            )
+        ).all()
+        busy_rows = [row[1:] for row in window_rows if row[0] not in affected_ids]
+        planner = _SlotPlanner(day_start, horizon_days + 1, duration, busy_rows)
+
+        # Other doctors who can cover, per department
+        covering = defaultdict(list)
+        if doctor_name:
+            for _, row_department, row_doctor in busy_rows:
+                if row_doctor and row_doctor != doctor_name and row_doctor not in covering[row_department]:
+                    covering[row_department].append(row_doctor)
+            if replacement_doctor:
+                for appointment in affected:
+                    if replacement_doctor not in covering[appointment.department]:
+                        covering[appointment.department].insert(0, replacement_doctor)
+
+        moves, unassigned = [], []
+        ordered = sorted(
+            affected,
+            key=lambda apt: (TYPE_PRIORITY.get(apt.appointment_type, len(TYPE_PRIORITY)), apt.appointment_date, apt.id)
+        )
+        for appointment in ordered:
+            if appointment.doctor_name:
+                own_lane = ("doctor", appointment.doctor_name)
+            else:
+                own_lane = ("department", appointment.department)
+            # Staying with the same doctor wins ties
+            options = [(planner.earliest(own_lane, next_day), appointment.doctor_name)]
+            for other in covering.get(appointment.department, ()):
+                options.append((planner.earliest(("doctor", other), appointment.appointment_date), other))
+            options = [option for option in options if option[0] is not None]
+            if not options:
+                unassigned.append(appointment)
+                continue
+            slot, new_doctor = min(options, key=lambda option: option[0])
+            planner.take(slot, appointment.department, new_doctor)
+            moves.append((appointment, slot, new_doctor))
+
+        result = {
+            "date": day_start,
+            "doctor_name": doctor_name,
+            "department": department,
+            "dry_run": dry_run,
+            "affected": len(affected),
+            "moved": [
+                {
+                    "appointment_id": appointment.id,
+                    "patient_name": appointment.patient_name,
+                    "appointment_type": appointment.appointment_type,
+                    "department": appointment.department,
+                    "from_date": appointment.appointment_date,
+                    "to_date": slot,
+                    "from_doctor": appointment.doctor_name,
+                    "to_doctor": new_doctor
+                }
+                for appointment, slot, new_doctor in moves
+            ],
+            "unassigned": [
+                {
+                    "appointment_id": appointment.id,
+                    "patient_name": appointment.patient_name,
+                    "appointment_type": appointment.appointment_type,
+                    "department": appointment.department,
+                    "appointment_date": appointment.appointment_date
+                }
+                for appointment in unassigned
+            ]
+        }
+
+        if dry_run or not moves:
+            return result
+
+        try:
+            now = datetime.utcnow()
+            stats_before = stats_service.dimension_keys(None)
+            stats_after = stats_service.dimension_keys(None)
+            for appointment, slot, _ in moves:
+                stats_before.update(stats_service.dimension_keys(appointment))
+                stats_after.update(stats_service.dimension_keys(SimpleNamespace(
+                    status=appointment.status,
+                    appointment_type=appointment.appointment_type,
+                    department=appointment.department,
+                    appointment_date=slot
+                )))
+            db.execute(
+                update(Appointment),
+                [
+                    {"id": appointment.id, "appointment_date": slot, "doctor_name": new_doctor, "updated_at": now}
+                    for appointment, slot, new_doctor in moves
+                ]
+            )
+            stats_service.apply_delta(db, stats_before, stats_after)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error applying bulk reschedule: {e}")
+            raise
+
+        response_cache.invalidate()
+        # One summary event instead of one per row; subscribers refetch
+        event_bus.publish("rescheduled", None, {
+            "date": day_start.isoformat(),
+            "doctor_name": doctor_name,
+            "department": department,
+            "moved": len(moves),
+            "unassigned": len(unassigned)
+        })
+        logger.info(
+            f"Rescheduled {len(moves)} of {len(affected)} appointments "
+            f"({len(unassigned)} unassigned) in {(time.perf_counter() - started) * 1000:.1f}ms"
+        )
+        return result
+
+
+# Global instance
+reschedule_service = RescheduleService()
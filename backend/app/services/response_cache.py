@@ -0,0 +1,117 @@
+"""
+In-process cache for serialized appointment API responses
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import hashlib
+import threading
+import time
+import logging
+
+from ..config import settings
+from ..metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_CACHE_HITS = CACHE_REQUESTS.labels("response_cache", "hit")
+_CACHE_MISSES = CACHE_REQUESTS.labels("response_cache", "miss")
+
+
+@dataclass
+class CachedResponse:
+    """A serialized response body together with its ETag"""
+    body: bytes
+    etag: str
+    stored_at: float
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized JSON responses with generation-based invalidation
+
+    Every write through AppointmentService bumps the generation and clears
+    the cache. Readers capture the generation before querying the database
+    and only store their result if no write happened in the meantime, so a
+    slow read can never repopulate the cache with stale data.
+
+    The cache is per process. With several workers the shared change feed
+    clears it when another worker's events arrive (see AppointmentEventBus);
+    the TTL bounds anything that bypasses the feed.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 30.0, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        """Current invalidation generation"""
+        return self._generation
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        """Build a strong ETag from a response body"""
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return a fresh cached response or None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry.stored_at > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                _CACHE_MISSES.inc()
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            _CACHE_HITS.inc()
+            return entry
+
+    def put(self, key: str, body: bytes, generation: int) -> CachedResponse:
+        """
+        Store a serialized body
+
+        Args:
+            key: Cache key
+            body: Serialized JSON body
+            generation: Generation captured before the data was read
+
+        Returns:
+            Cached response entry (stored or not)
+        """
+        entry = CachedResponse(body=body, etag=self.make_etag(body), stored_at=time.monotonic())
+        if not self.enabled:
+            return entry
+        with self._lock:
+            if generation != self._generation:
+                return entry
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self):
+        """Drop all cached responses after a write"""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+        logger.debug(f"Response cache invalidated (generation {self._generation})")
+
+
+# Global instance
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED
+)
@@ -0,0 +1,183 @@
+"""
+Incrementally maintained appointment statistics
+"""
+from collections import Counter
+from datetime import date
+from typing import Optional
+from sqlalchemy import func, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from ..models import Appointment, AppointmentStat, ArchivedAppointment
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNASSIGNED = "unassigned"
+
+# Dimension name -> function extracting the key from an appointment
+DIMENSIONS = {
+    "total": lambda apt: "all",
+    "status": lambda apt: apt.status.value if apt.status else UNASSIGNED,
+    "appointment_type": lambda apt: apt.appointment_type.value if apt.appointment_type else UNASSIGNED,
+    "department": lambda apt: apt.department or UNASSIGNED,
+    "day": lambda apt: apt.appointment_date.date().isoformat() if apt.appointment_date else UNASSIGNED,
+}
+
+
+class StatsService:
+    """Service for reading and maintaining appointment aggregates"""
+
+    @staticmethod
+    def dimension_keys(appointment: Optional[Appointment]) -> Counter:
+        """
+        Get the (dimension, key) pairs an appointment contributes to
+
+        Args:
+            appointment: Appointment, or None for no contribution
+
+        Returns:
+            Counter of (dimension, key) -> 1
+        """
+        if appointment is None:
+            return Counter()
+        return Counter((name, extract(appointment)) for name, extract in DIMENSIONS.items())
+
+    @staticmethod
+    def apply_delta(db: Session, before: Counter, after: Counter):
+        """
+        Update aggregate rows for a change from `before` to `after`
+
+        Must be called inside the caller's transaction, before commit, so
+        the aggregates commit or roll back together with the appointment.
+        """
+        delta = Counter(after)
+        delta.subtract(before)
+        for (dimension, key), change in delta.items():
+            if change:
+                StatsService._increment(db, dimension, key, change)
+
+    @staticmethod
+    def _increment(db: Session, dimension: str, key: str, change: int):
+        """Add `change` to a single aggregate row, creating it if needed"""
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+            stmt = insert(AppointmentStat).values(dimension=dimension, key=key, count=change)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["dimension", "key"],
+                set_={"count": AppointmentStat.count + change}
+            )
+            db.execute(stmt)
+            return
+
+        stat = db.get(AppointmentStat, (dimension, key), with_for_update=True)
+        if stat is None:
+            db.add(AppointmentStat(dimension=dimension, key=key, count=change))
+        else:
+            stat.count = stat.count + change
+
+    @staticmethod
+    def get_stats(
+        db: Session,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> dict:
+        """
+        Read precomputed statistics
+
+        Args:
+            db: Database session
+            start_date: First day to include in the daily volume (inclusive)
+            end_date: Last day to include in the daily volume (inclusive)
+
+        Returns:
+            Dictionary with total and per-dimension counts
+        """
+        stats = {name: {} for name in DIMENSIONS}
+        for stat in db.query(AppointmentStat).filter(AppointmentStat.count != 0).all():
+            stats.setdefault(stat.dimension, {})[stat.key] = stat.count
+
+        by_day = stats["day"]
+        if start_date or end_date:
+            low = start_date.isoformat() if start_date else ""
+            high = end_date.isoformat() if end_date else "9999-12-31"
+            by_day = {day: count for day, count in by_day.items() if low <= day <= high}
+
+        return {
+            "total": stats["total"].get("all", 0),
+            "by_status": stats["status"],
+            "by_type": stats["appointment_type"],
+            "by_department": stats["department"],
+            "by_day": dict(sorted(by_day.items()))
+        }
+
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """
+        Recompute all aggregates from the live and archived appointments
+
+        Used to repair drift (e.g. after rows were edited outside the
+        service) and to backfill an existing database.
+
+        Returns:
+            Number of aggregate rows written
+        """
+        try:
+            db.execute(delete(AppointmentStat))
+            totals = Counter()
+            # Archived appointments still count towards the statistics
+            for model in (Appointment, ArchivedAppointment):
+                totals[("total", "all")] += db.query(func.count(model.id)).scalar() or 0
+                columns = {
+                    "status": model.status,
+                    "appointment_type": model.appointment_type,
+                    "department": model.department,
+                    "day": func.date(model.appointment_date),
+                }
+                for dimension, column in columns.items():
+                    for value, count in db.query(column, func.count(model.id)).group_by(column).all():
+                        if hasattr(value, "value"):
+                            value = value.value
+                        elif isinstance(value, date):
+                            value = value.isoformat()
+                        totals[(dimension, value if value is not None else UNASSIGNED)] += count
+            rows = [
+                AppointmentStat(dimension=dimension, key=key, count=count)
+                for (dimension, key), count in totals.items()
+            ]
+            db.add_all(rows)
+            db.commit()
+            logger.info(f"Rebuilt appointment statistics ({len(rows)} rows)")
+            return len(rows)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error rebuilding statistics: {e}")
+            raise
+
+    @staticmethod
+    def ensure_initialized(db: Session):
+        """Backfill aggregates for a database created before they existed"""
+        has_stats = db.query(AppointmentStat.dimension).first() is not None
+        has_appointments = (
+            db.query(Appointment.id).first() is not None
+            or db.query(ArchivedAppointment.id).first() is not None
+        )
+        if has_appointments and not has_stats:
+            StatsService.rebuild(db)
+
+
+# Global instance
+stats_service = StatsService()
+
+
+if __name__ == "__main__":
+    # Drift repair: python -m app.services.stats_service
+    from ..database import SessionLocal, init_db
+    init_db()
+    session = SessionLocal()
+    try:
+        count = stats_service.rebuild(session)
+        print(f"Rebuilt {count} statistics rows")
+    finally:
+        session.close()
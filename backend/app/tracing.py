@@ -0,0 +1,230 @@
+"""
+Lightweight request tracing
+
+Each HTTP request gets a request id (taken from X-Request-ID or generated)
+and, if sampled, a trace that collects timed spans from the routers and
+services. Sampled requests report their per-stage breakdown in the
+Server-Timing response header and can be exported as OTLP-compatible JSON
+lines to a local file.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional
+import json
+import os
+import queue
+import random
+import threading
+import time
+import logging
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace"""
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """All spans recorded for one request"""
+    trace_id: str
+    request_id: str
+    sampled: bool
+    spans: list = field(default_factory=list)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+def current_request_id() -> Optional[str]:
+    """Request id of the request being handled, if any"""
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block of work as a child of the current span
+
+    A no-op unless the current request is sampled, so it is cheap to leave
+    in hot paths.
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.sampled:
+        yield
+        return
+
+    record = Span(
+        span_id=_new_id(8),
+        parent_id=_current_span_id.get(),
+        name=name,
+        start_ns=time.time_ns(),
+        attributes=attributes
+    )
+    token = _current_span_id.set(record.span_id)
+    try:
+        yield record
+    except Exception as e:
+        record.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        record.end_ns = time.time_ns()
+        _current_span_id.reset(token)
+        trace.spans.append(record)
+
+
+class RequestIdFilter(logging.Filter):
+    """Add the current request id to log records as ``request_id``"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or "-"
+        return True
+
+
+def server_timing(spans: list, total_ms: float) -> str:
+    """Build a Server-Timing header value, summing spans with the same name"""
+    durations: dict[str, float] = {}
+    for record in spans:
+        durations[record.name] = durations.get(record.name, 0.0) + (record.end_ns - record.start_ns) / 1e6
+    parts = [f"{name};dur={duration:.1f}" for name, duration in durations.items()]
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
+
+
+class FileSpanExporter:
+    """Append traces as OTLP/JSON lines to a file from a background thread"""
+
+    def __init__(self, path: str, service_name: str = "hospital-appointment-assistant"):
+        self.path = path
+        self.service_name = service_name
+        self._queue: "queue.SimpleQueue[Trace]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        self._queue.put(trace)
+
+    def _to_otlp(self, trace: Trace) -> dict:
+        spans = []
+        for record in trace.spans:
+            attributes = [{"key": "request.id", "value": {"stringValue": trace.request_id}}]
+            attributes += [
+                {"key": key, "value": {"stringValue": str(value)}}
+                for key, value in record.attributes.items()
+            ]
+            spans.append({
+                "traceId": trace.trace_id,
+                "spanId": record.span_id,
+                "parentSpanId": record.parent_id or "",
+                "name": record.name,
+                "kind": 2 if record.parent_id is None else 1,
+                "startTimeUnixNano": str(record.start_ns),
+                "endTimeUnixNano": str(record.end_ns),
+                "attributes": attributes
+            })
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": self.service_name}}
+                ]},
+                "scopeSpans": [{"scope": {"name": "app.tracing"}, "spans": spans}]
+            }]
+        }
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                with open(self.path, "a") as output:
+                    output.write(json.dumps(self._to_otlp(trace)) + "\n")
+            except OSError as e:
+                logger.warning(f"Failed to export trace {trace.trace_id}: {e}")
+
+
+_exporter = FileSpanExporter(settings.TRACE_EXPORT_PATH) if settings.TRACE_EXPORT_PATH else None
+
+
+def _parse_traceparent(value: str) -> Optional[tuple[str, str, bool]]:
+    """Parse a W3C traceparent header into (trace id, parent span id, sampled)"""
+    parts = value.split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2], parts[3] == "01"
+
+
+class TracingMiddleware:
+    """Start a trace per HTTP request and report it in response headers"""
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or _new_id(16)
+        parent = _parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        if parent:
+            trace_id, parent_span_id, sampled = parent
+        else:
+            trace_id, parent_span_id = _new_id(16), None
+            sampled = random.random() < self.sample_rate
+
+        trace = Trace(trace_id=trace_id, request_id=request_id, sampled=sampled)
+        root = Span(
+            span_id=_new_id(8),
+            parent_id=parent_span_id,
+            name=f"{scope['method']} {scope['path']}",
+            start_ns=time.time_ns()
+        )
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span_id.set(root.span_id)
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                response_headers = list(message.get("headers", []))
+                response_headers.append((b"x-request-id", request_id.encode("latin-1")))
+                if settings.SERVER_TIMING_ENABLED:
+                    total_ms = (time.perf_counter() - started) * 1000
+                    if trace.sampled:
+                        value = server_timing(trace.spans, total_ms)
+                    else:
+                        value = f"total;dur={total_ms:.1f}"
+                    response_headers.append((b"server-timing", value.encode("latin-1")))
+                message = {**message, "headers": response_headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_span_id.reset(span_token)
+            _current_trace.reset(trace_token)
+            if trace.sampled and _exporter is not None:
+                root.end_ns = time.time_ns()
+                route = scope.get("route")
+                root.attributes["http.route"] = getattr(route, "path", scope["path"])
+                trace.spans.append(root)
+                _exporter.export(trace)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Archival benchmark: live-table queries before and after archiving history
+
+Seeds a fresh SQLite database with `--history` old completed/cancelled
+appointments plus `--live` upcoming ones, times the availability and
+list queries, runs archive_service.archive, and times them again.
+
+Usage:
+    python benchmark_archive.py
+    python benchmark_archive.py --history 200000 --live 2000 --batch-size 1000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+
+def seed(db, history: int, live: int, seed_value: int):
+    from sqlalchemy import insert
+    from app.models import Appointment, AppointmentStatus, AppointmentType
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    rows = []
+    for index in range(history + live):
+        if index < history:
+            when = now - timedelta(days=rng.randint(31, 3650), hours=rng.randint(0, 7))
+            status = rng.choice([AppointmentStatus.COMPLETED, AppointmentStatus.CANCELLED])
+        else:
+            when = now + timedelta(days=rng.randint(1, 14), hours=rng.randint(0, 7))
+            status = AppointmentStatus.CONFIRMED
+        rows.append({
+            "patient_name": f"Patient {index}",
+            "patient_phone": f"555{index:07d}",
+            "symptoms": "Benchmark",
+            "appointment_type": AppointmentType.GENERAL,
+            "appointment_date": when,
+            "status": status,
+            "department": "General Medicine"
+        })
+    for start in range(0, len(rows), 10000):
+        db.execute(insert(Appointment), rows[start:start + 10000])
+    db.commit()
+
+
+def median_ms(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=100000, help="Old completed/cancelled appointments")
+    parser.add_argument("--live", type=int, default=1000, help="Upcoming appointments")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="haa_archive_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DEBUG"] = "False"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app.database import SessionLocal, init_db
+    from app.models import Appointment
+    from app.services import appointment_service, archive_service
+    init_db()
+
+    db = SessionLocal()
+    try:
+        seed(db, args.history, args.live, args.seed)
+        tomorrow = datetime.utcnow() + timedelta(days=1)
+
+        def measure():
+            return {
+                "live_rows": db.query(Appointment).count(),
+                "available_slots_ms": median_ms(
+                    lambda: appointment_service.get_available_slots(db, tomorrow), args.repeat
+                ),
+                "list_ms": median_ms(lambda: appointment_service.get_appointments(db), args.repeat),
+                "list_with_archive_ms": median_ms(
+                    lambda: appointment_service.get_appointments(db, include_archived=True), args.repeat
+                )
+            }
+
+        before = measure()
+        started = time.perf_counter()
+        moved = archive_service.archive(db, batch_size=args.batch_size, pause_seconds=0)
+        archive_ms = round((time.perf_counter() - started) * 1000, 1)
+        after = measure()
+    finally:
+        db.close()
+
+    print(json.dumps({
+        "history": args.history,
+        "live": args.live,
+        "archived": moved,
+        "archive_ms": archive_ms,
+        "before": before,
+        "after": after
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
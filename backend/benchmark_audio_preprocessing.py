@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark audio preprocessing on synthesized browser-style recordings
+
+Builds 48kHz stereo WAVs with silent lead-in/lead-out around a tone (like
+test_stt.py, but at browser capture settings) and reports payload size,
+preprocessing time and estimated upload time. With --groq the real STT
+call is timed for the original and processed audio (needs GROQ_API_KEY).
+
+Usage:
+    python benchmark_audio_preprocessing.py --speech-seconds 10 --uplink-mbps 5
+"""
+import argparse
+import asyncio
+import io
+import os
+import time
+import wave
+
+import numpy as np
+
+
+def create_recording(speech_seconds, lead_in=3.0, lead_out=2.0, sample_rate=48000, channels=2):
+    """Create a WAV with silence, a 440Hz tone with light noise, then silence"""
+    t = np.arange(int(speech_seconds * sample_rate)) / sample_rate
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t) + 0.01 * np.random.randn(len(t))
+    silence_in = 0.0005 * np.random.randn(int(lead_in * sample_rate))
+    silence_out = 0.0005 * np.random.randn(int(lead_out * sample_rate))
+    mono = np.concatenate([silence_in, tone, silence_out])
+    pcm = (np.clip(mono, -1, 1) * 32767).astype("<i2")
+    interleaved = np.repeat(pcm, channels)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(interleaved.tobytes())
+    return buffer.getvalue()
+
+
+async def time_transcription(data):
+    from app.services import groq_service
+    started = time.perf_counter()
+    await groq_service.transcribe_audio(("benchmark.wav", io.BytesIO(data)))
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--speech-seconds", type=float, default=10.0)
+    parser.add_argument("--uplink-mbps", type=float, default=5.0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--groq", action="store_true", help="also time real Groq STT calls")
+    args = parser.parse_args()
+
+    from app.services.audio_preprocessing import AudioPreprocessor
+
+    original = create_recording(args.speech_seconds)
+    preprocessor = AudioPreprocessor()
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        processed, result = preprocessor.process(original)
+        best = min(best, time.perf_counter() - started)
+
+    def upload_seconds(size):
+        return size * 8 / (args.uplink_mbps * 1_000_000)
+
+    print(f"Original:        {result.original_bytes:>12,} bytes  {result.original_seconds:6.2f}s  "
+          f"{result.original_sample_rate}Hz x{result.original_channels}")
+    print(f"Processed:       {result.processed_bytes:>12,} bytes  {result.processed_seconds:6.2f}s  16000Hz x1")
+    print(f"Bytes saved:     {result.bytes_saved:>12,} ({100 * result.bytes_saved / result.original_bytes:.1f}%)")
+    print(f"Preprocess time: {best * 1000:12.2f} ms")
+    print(f"Upload @ {args.uplink_mbps} Mbps: {upload_seconds(result.original_bytes):.2f}s -> "
+          f"{upload_seconds(result.processed_bytes) + best:.2f}s (incl. preprocessing)")
+
+    if args.groq:
+        original_stt = asyncio.run(time_transcription(original))
+        processed_stt = asyncio.run(time_transcription(processed))
+        print(f"Groq STT:        {original_stt:.2f}s -> {processed_stt:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Load benchmark with local stub upstreams
+
+Starts stub Groq (chat completions) and ElevenLabs (text-to-speech) servers
+in this process, boots the backend against them with a throwaway SQLite
+database, then drives a weighted mix of triage, conversation (with TTS),
+slot queries and bookings from a fixed number of concurrent clients.
+Throughput and p50/p95/p99 latency are reported as JSON, overall and per
+operation, so runs from different commits can be compared.
+
+Usage:
+    python benchmark_load.py --duration 30 --concurrency 32 --output before.json
+    python benchmark_load.py --duration 30 --concurrency 32 --compare before.json
+    python benchmark_load.py --upstream-latency-ms 400 --upstream-jitter-ms 150 --upstream-error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+from aiohttp import web
+
+APP_PORT = 8766
+STUB_PORT = 8767
+
+SYMPTOMS = [
+    "Headache and mild fever for two days",
+    "Persistent cough and sore throat",
+    "Sharp chest pain when breathing",
+    "Rash on both arms after gardening",
+    "Lower back pain after lifting boxes",
+    "Dizziness when standing up quickly"
+]
+DEPARTMENTS = ["General Medicine", "Cardiology", "Dermatology", "Orthopedics"]
+
+
+class StubUpstreams:
+    """Minimal Groq and ElevenLabs stand-ins with configurable latency and failures"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float, error_rate: float, tts_bytes: int, seed: int):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.audio = os.urandom(tts_bytes)
+        self.random = random.Random(seed)
+        self.calls = {"chat_completion": 0, "text_to_speech": 0, "errors": 0}
+
+    async def _delay_or_fail(self) -> bool:
+        """Sleep for the simulated latency; True if this call should fail"""
+        delay = self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+        if self.random.random() < self.error_rate:
+            self.calls["errors"] += 1
+            return True
+        return False
+
+    async def chat_completion(self, request: web.Request) -> web.Response:
+        self.calls["chat_completion"] += 1
+        body = await request.json()
+        if await self._delay_or_fail():
+            return web.json_response({"error": {"message": "stub upstream error"}}, status=500)
+
+        system_prompt = body["messages"][0]["content"] if body.get("messages") else ""
+        if "triage" in system_prompt.lower():
+            content = json.dumps({
+                "severity": self.random.choice(["low", "moderate", "high"]),
+                "advice": "Rest, stay hydrated and monitor your symptoms.",
+                "needs_appointment": True,
+                "urgency": self.random.choice(["routine", "urgent"]),
+                "department": self.random.choice(DEPARTMENTS)
+            })
+        else:
+            content = "I'm sorry to hear that. Could you tell me how long you've had these symptoms?"
+
+        return web.json_response({
+            "id": f"chatcmpl-{self.random.getrandbits(32):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 120, "completion_tokens": 40, "total_tokens": 160}
+        })
+
+    async def text_to_speech(self, request: web.Request) -> web.Response:
+        self.calls["text_to_speech"] += 1
+        await request.read()
+        if await self._delay_or_fail():
+            return web.Response(status=500, text="stub upstream error")
+        return web.Response(body=self.audio, content_type="audio/mpeg")
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post("/openai/v1/chat/completions", self.chat_completion)
+        app.router.add_post("/v1/text-to-speech/{voice_id}", self.text_to_speech)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+        return runner
+
+
+def start_server(database_path: str) -> subprocess.Popen:
+    """Boot the backend with uvicorn, pointed at the stub upstreams"""
+    env = dict(
+        os.environ,
+        GROQ_API_KEY="benchmark",
+        ELEVENLABS_API_KEY="benchmark",
+        GROQ_BASE_URL=f"http://127.0.0.1:{STUB_PORT}",
+        ELEVENLABS_BASE_URL=f"http://127.0.0.1:{STUB_PORT}",
+        DATABASE_URL=f"sqlite:///{database_path}",
+        DEBUG="False",
+        # All simulated clients share one IP; don't let the per-client limit skew results
+        CLIENT_RATE_PER_MINUTE="1000000000",
+        CLIENT_BURST="1000000"
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--host", "127.0.0.1", "--port", str(APP_PORT), "--log-level", "warning"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env
+    )
+
+
+async def wait_ready(base_url: str):
+    async with aiohttp.ClientSession() as session:
+        for _ in range(150):
+            try:
+                async with session.get(f"{base_url}/health"):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Benchmark server did not start")
+
+
+def _next_weekday(rng: random.Random, max_days: int) -> datetime:
+    day = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    day += timedelta(days=rng.randint(1, max_days))
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def build_request(operation: str, rng: random.Random) -> tuple[str, str, dict]:
+    """Method, path and JSON body for one operation"""
+    if operation == "triage":
+        return "POST", "/api/triage/analyze", {
+            "symptoms": rng.choice(SYMPTOMS),
+            "patient_name": f"Load Test {rng.randrange(100000)}",
+            "patient_phone": f"555{rng.randrange(10 ** 7):07d}"
+        }
+    if operation == "conversation":
+        return "POST", "/api/triage/conversation", {
+            "messages": [
+                {"role": "assistant", "content": "Hello, how can I help you today?"},
+                {"role": "user", "content": rng.choice(SYMPTOMS)}
+            ],
+            "enable_tts": True
+        }
+    if operation == "slots":
+        return "POST", "/api/appointments/available-slots", {
+            "date": _next_weekday(rng, 14).isoformat(),
+            "department": rng.choice(DEPARTMENTS)
+        }
+    # booking: random half-hour slot in working hours over the next month
+    slot = _next_weekday(rng, 30) + timedelta(minutes=30 * rng.randrange(16), hours=9)
+    return "POST", "/api/appointments", {
+        "patient_name": f"Load Test {rng.randrange(100000)}",
+        "patient_phone": f"555{rng.randrange(10 ** 7):07d}",
+        "symptoms": rng.choice(SYMPTOMS),
+        "appointment_date": slot.isoformat(),
+        "department": rng.choice(DEPARTMENTS)
+    }
+
+
+async def client(session, base_url, mix, rng, deadline, measure_from, samples):
+    operations, weights = zip(*mix.items())
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        method, path, body = build_request(operation, rng)
+        started = time.perf_counter()
+        try:
+            async with session.request(method, f"{base_url}{path}", json=body) as response:
+                await response.read()
+                status = response.status
+        except aiohttp.ClientError:
+            status = 0
+        finished = time.perf_counter()
+        if started >= measure_from:
+            samples.append((operation, status, finished - started))
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = sorted(latency for _, _, latency in samples)
+    statuses: dict[str, int] = {}
+    for _, status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        # 4xx counts too: a rejected request says nothing about the latency being measured
+        "errors": sum(1 for _, status, _ in samples if not 200 <= status < 300),
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict):
+    """Print the change against a previous report"""
+    print(f"Comparison against {baseline.get('commit', 'baseline')}:", file=sys.stderr)
+    names = ["overall"] + sorted(report["operations"])
+    for name in names:
+        current = report["overall"] if name == "overall" else report["operations"][name]
+        previous = baseline["overall"] if name == "overall" else baseline.get("operations", {}).get(name)
+        if not previous:
+            continue
+        changes = []
+        for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            before, after = previous[metric], current[metric]
+            delta = (after - before) / before * 100 if before else 0.0
+            changes.append(f"{metric} {before} -> {after} ({delta:+.1f}%)")
+        print(f"  {name:<13} " + ", ".join(changes), file=sys.stderr)
+
+
+async def run(args) -> dict:
+    mix = {
+        "triage": args.triage_weight,
+        "conversation": args.conversation_weight,
+        "slots": args.slots_weight,
+        "booking": args.booking_weight
+    }
+    mix = {operation: weight for operation, weight in mix.items() if weight > 0}
+    stubs = StubUpstreams(
+        args.upstream_latency_ms, args.upstream_jitter_ms, args.upstream_error_rate,
+        args.tts_bytes, args.seed
+    )
+    runner = await stubs.start(STUB_PORT)
+    base_url = f"http://127.0.0.1:{APP_PORT}"
+
+    with tempfile.TemporaryDirectory(prefix="haa_bench_") as workdir:
+        server = start_server(os.path.join(workdir, "bench.db"))
+        try:
+            await wait_ready(base_url)
+            samples: list = []
+            connector = aiohttp.TCPConnector(limit=args.concurrency)
+            timeout = aiohttp.ClientTimeout(total=args.request_timeout)
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                started = time.perf_counter()
+                measure_from = started + args.warmup
+                deadline = measure_from + args.duration
+                await asyncio.gather(*(
+                    client(session, base_url, mix, random.Random(args.seed + i), deadline, measure_from, samples)
+                    for i in range(args.concurrency)
+                ))
+                elapsed = time.perf_counter() - measure_from
+        finally:
+            server.terminate()
+            server.wait()
+            await runner.cleanup()
+
+    by_operation: dict[str, list] = {}
+    for sample in samples:
+        by_operation.setdefault(sample[0], []).append(sample)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "config": {
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "concurrency": args.concurrency,
+            "mix": mix,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "upstream_jitter_ms": args.upstream_jitter_ms,
+            "upstream_error_rate": args.upstream_error_rate,
+            "tts_bytes": args.tts_bytes,
+            "seed": args.seed
+        },
+        "overall": summarize(samples, elapsed),
+        "operations": {
+            operation: summarize(operation_samples, elapsed)
+            for operation, operation_samples in sorted(by_operation.items())
+        },
+        "upstream_calls": stubs.calls
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="Seconds of unmeasured traffic first")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--triage-weight", type=float, default=3)
+    parser.add_argument("--conversation-weight", type=float, default=2)
+    parser.add_argument("--slots-weight", type=float, default=4)
+    parser.add_argument("--booking-weight", type=float, default=1)
+    parser.add_argument("--upstream-latency-ms", type=float, default=250)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=100)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--tts-bytes", type=int, default=48000, help="Size of the stub TTS audio")
+    parser.add_argument("--request-timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(report, json.load(baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Bulk reschedule benchmark
+
+Seeds a fresh SQLite database with a half-full schedule for several
+doctors per department over the horizon, plus `--affected` appointments
+for one absent doctor on the outage day, then times
+reschedule_service.bulk_reschedule as a dry run and for real.
+
+Usage:
+    python benchmark_reschedule.py
+    python benchmark_reschedule.py --affected 5000 --doctors 20 --horizon 14
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+TYPES = ["general", "emergency", "follow_up", "consultation"]
+
+
+def seed(db, args, day: datetime):
+    from sqlalchemy import insert
+    from app.models import Appointment, AppointmentStatus, AppointmentType
+    from app.config import settings
+
+    rng = random.Random(args.seed)
+    duration = timedelta(minutes=settings.APPOINTMENT_DURATION_MINUTES)
+    per_day = (settings.WORKING_HOURS_END - settings.WORKING_HOURS_START) * 60 // settings.APPOINTMENT_DURATION_MINUTES
+    departments = [f"Department {index}" for index in range(args.departments)]
+
+    def row(index, when, doctor, department):
+        return {
+            "patient_name": f"Patient {index}",
+            "patient_phone": f"555{index:07d}",
+            "symptoms": "Benchmark",
+            "appointment_type": AppointmentType(rng.choice(TYPES)),
+            "appointment_date": when,
+            "status": AppointmentStatus.CONFIRMED,
+            "doctor_name": doctor,
+            "department": department
+        }
+
+    rows = []
+    for department in departments:
+        for doctor_index in range(args.doctors):
+            doctor = f"Dr. {department[-1]}-{doctor_index}"
+            for offset in range(args.horizon + 1):
+                first = (day + timedelta(days=offset)).replace(hour=settings.WORKING_HOURS_START)
+                for slot in range(per_day):
+                    if rng.random() < args.fill:
+                        rows.append(row(len(rows), first + duration * slot, doctor, department))
+
+    first = day.replace(hour=settings.WORKING_HOURS_START)
+    for _ in range(args.affected):
+        when = first + duration * rng.randrange(per_day)
+        rows.append(row(len(rows), when, "Dr. Absent", departments[0]))
+
+    db.execute(insert(Appointment), rows)
+    db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--affected", type=int, default=3000, help="Appointments of the absent doctor")
+    parser.add_argument("--departments", type=int, default=5)
+    parser.add_argument("--doctors", type=int, default=10, help="Doctors per department")
+    parser.add_argument("--horizon", type=int, default=30, help="Days to search for free slots")
+    parser.add_argument("--fill", type=float, default=0.5, help="Share of slots already booked")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="haa_reschedule_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DEBUG"] = "False"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app.database import SessionLocal, init_db
+    from app.services import reschedule_service
+    init_db()
+
+    day = (datetime.utcnow() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    db = SessionLocal()
+    try:
+        total = seed(db, args, day)
+        timings = {}
+        for dry_run in (True, False):
+            started = time.perf_counter()
+            result = reschedule_service.bulk_reschedule(
+                db, day, doctor_name="Dr. Absent", horizon_days=args.horizon, dry_run=dry_run
+            )
+            timings["dry_run_ms" if dry_run else "apply_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    finally:
+        db.close()
+
+    moved_types = {}
+    for move in result["moved"]:
+        key = move["appointment_type"].value
+        moved_types[key] = moved_types.get(key, 0) + 1
+
+    print(json.dumps({
+        "appointments": total,
+        "affected": result["affected"],
+        "moved": len(result["moved"]),
+        "unassigned": len(result["unassigned"]),
+        "moved_by_type": moved_types,
+        **timings
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
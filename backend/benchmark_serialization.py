@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for appointment list responses
+
+Builds N in-memory appointment rows and times three ways of producing the
+JSON body, then reports the size on the wire with gzip and brotli:
+
+- validated: AppointmentResponse validation (from_attributes) + pydantic dump_json
+  (what the list endpoint did before)
+- stdlib:    validation + jsonable_encoder + json.dumps (FastAPI's default
+  response_model path)
+- fast:      direct row dicts + orjson (FAST_SERIALIZATION_ENABLED)
+
+Usage:
+    python benchmark_serialization.py
+    python benchmark_serialization.py --rows 1000 --repeat 20
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("DEBUG", "False")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models import Appointment, AppointmentStatus, AppointmentType
+from app.schemas import AppointmentResponse
+from app.serialization import dump_appointments, orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def make_rows(count: int) -> list:
+    started = datetime(2030, 1, 1, 9)
+    rows = []
+    for index in range(count):
+        rows.append(Appointment(
+            id=index + 1,
+            patient_name=f"Patient {index}",
+            patient_phone=f"555{index:07d}",
+            patient_email=f"patient{index}@example.com",
+            symptoms="Persistent cough and mild fever for three days, worse at night",
+            triage_notes=json.dumps({"severity": "moderate", "urgency": "routine"}),
+            ai_recommendation="Rest, fluids and a follow-up with general medicine.",
+            appointment_type=AppointmentType.GENERAL,
+            appointment_date=started + timedelta(minutes=30 * index),
+            status=AppointmentStatus.CONFIRMED,
+            doctor_name="Dr. Smith",
+            department="General Medicine",
+            created_at=started,
+            updated_at=started
+        ))
+    return rows
+
+
+def median_ms(function, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    adapter = TypeAdapter(List[AppointmentResponse])
+
+    def validated():
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    def stdlib():
+        models = adapter.validate_python(rows, from_attributes=True)
+        return json.dumps(jsonable_encoder(models)).encode("utf-8")
+
+    def fast():
+        return dump_appointments(rows)
+
+    body = fast()
+    if json.loads(body) != json.loads(validated()):
+        raise SystemExit("Fast serialization output differs from the validated output")
+
+    encoding = {"raw_bytes": len(body)}
+    started = time.perf_counter()
+    encoding["gzip_bytes"] = len(gzip.compress(body, compresslevel=6))
+    encoding["gzip_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    if brotli is not None:
+        started = time.perf_counter()
+        encoding["brotli_bytes"] = len(brotli.compress(body, quality=4))
+        encoding["brotli_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+    print(json.dumps({
+        "rows": args.rows,
+        "orjson": orjson is not None,
+        "serialize_ms": {
+            "validated": median_ms(validated, args.repeat),
+            "stdlib": median_ms(stdlib, args.repeat),
+            "fast": median_ms(fast, args.repeat)
+        },
+        "wire": encoding
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
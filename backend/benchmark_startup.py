@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget check for the backend
+
+Imports app.main in fresh interpreters (so nothing is cached in
+sys.modules) and reports the median import time, plus the slowest modules
+imported by app.main according to ``python -X importtime``. Exits non-zero when the median exceeds the
+budget, so it can gate CI or be compared between commits.
+
+Usage:
+    python benchmark_startup.py
+    python benchmark_startup.py --budget-ms 800 --runs 7 --top 15 --depth 3
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+MEASURE = (
+    "import time; started = time.perf_counter(); import app.main; "
+    "print((time.perf_counter() - started) * 1000)"
+)
+
+
+def child_env() -> dict:
+    # No API keys: importing the app must not need them
+    env = {key: value for key, value in os.environ.items()
+           if key not in ("GROQ_API_KEY", "ELEVENLABS_API_KEY")}
+    env["DEBUG"] = "False"
+    return env
+
+
+def import_ms(cwd: str) -> float:
+    output = subprocess.check_output([sys.executable, "-c", MEASURE], cwd=cwd, env=child_env())
+    return float(output.decode().strip().splitlines()[-1])
+
+
+def parse_importtime(stderr: str) -> list[tuple[int, str, float]]:
+    """(depth, module, cumulative ms) for each ``-X importtime`` line, in output order"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        # One space after the bar, then two per nesting level
+        depth = (len(module) - len(module.lstrip()) - 1) // 2
+        entries.append((depth, module.strip(), int(cumulative) / 1000))
+    return entries
+
+
+def slowest_imports(cwd: str, top: int, max_depth: int) -> list[tuple[int, str, float]]:
+    """Modules imported by app.main with the largest cumulative import time"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=cwd, env=child_env(), capture_output=True, text=True, check=True
+    )
+    entries = parse_importtime(result.stderr)
+    # Children are printed before their parent, so everything app.main
+    # imported is the run of deeper entries right before its own line
+    end = next(index for index, (depth, module, _) in enumerate(entries) if depth == 0 and module == "app.main")
+    start = end
+    while start > 0 and entries[start - 1][0] > 0:
+        start -= 1
+    nested = [entry for entry in entries[start:end] if entry[0] <= max_depth]
+    return sorted(nested, key=lambda entry: entry[2], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=1500, help="Maximum median import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="How many slow imports to list")
+    parser.add_argument("--depth", type=int, default=2, help="How many import levels below app.main to consider")
+    args = parser.parse_args()
+
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    samples = [import_ms(cwd) for _ in range(args.runs)]
+    median = statistics.median(samples)
+
+    print(f"import app.main: median {median:.0f} ms over {args.runs} runs "
+          f"(min {min(samples):.0f}, max {max(samples):.0f}), budget {args.budget_ms:.0f} ms")
+    print(f"Slowest imports under app.main, up to {args.depth} levels deep (cumulative):")
+    for depth, module, ms in slowest_imports(cwd, args.top, args.depth):
+        print(f"  {ms:8.1f} ms  {'  ' * (depth - 1)}{module}")
+
+    if median > args.budget_ms:
+        print("FAIL: import time is over budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark precomputed appointment statistics against naive GROUP BY scans
+
+Usage:
+    python benchmark_stats.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Appointment, AppointmentStatus, AppointmentType, Base
+from app.services.stats_service import stats_service
+
+DEPARTMENTS = ["General Medicine", "Cardiology", "Neurology", "Pediatrics", "Orthopedics", None]
+
+
+def populate(session, rows, chunk_size=50000):
+    """Bulk insert synthetic appointments"""
+    start = datetime(2024, 1, 1, 9, 0)
+    statuses = list(AppointmentStatus)
+    types = list(AppointmentType)
+    now = datetime.utcnow()
+    for offset in range(0, rows, chunk_size):
+        batch = [
+            {
+                "patient_name": f"Patient {i}",
+                "patient_phone": "5550000000",
+                "appointment_type": random.choice(types),
+                "appointment_date": start + timedelta(minutes=30 * random.randrange(0, 365 * 16)),
+                "status": random.choice(statuses),
+                "department": random.choice(DEPARTMENTS),
+                "created_at": now,
+                "updated_at": now,
+            }
+            for i in range(offset, min(offset + chunk_size, rows))
+        ]
+        session.execute(insert(Appointment), batch)
+    session.commit()
+
+
+def naive_stats(session):
+    """Aggregate with full-table GROUP BY scans, as a client-side view would need"""
+    result = {"total": session.query(func.count(Appointment.id)).scalar()}
+    for name, column in (
+        ("by_status", Appointment.status),
+        ("by_type", Appointment.appointment_type),
+        ("by_department", Appointment.department),
+        ("by_day", func.date(Appointment.appointment_date)),
+    ):
+        result[name] = dict(session.query(column, func.count(Appointment.id)).group_by(column).all())
+    return result
+
+
+def timed(fn, repeat):
+    """Return the best wall time of `repeat` runs in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+
+        print(f"Populating {args.rows:,} appointments...")
+        started = time.perf_counter()
+        populate(session, args.rows)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+        rebuild_ms = timed(lambda: stats_service.rebuild(session), 1)
+        naive_ms = timed(lambda: naive_stats(session), args.repeat)
+        precomputed_ms = timed(lambda: stats_service.get_stats(session), args.repeat)
+
+        appointment = session.query(Appointment).first()
+        before = stats_service.dimension_keys(appointment)
+        appointment.status = AppointmentStatus.CONFIRMED
+        after = stats_service.dimension_keys(appointment)
+        delta_ms = timed(lambda: stats_service.apply_delta(session, before, after), 1000)
+        session.rollback()
+
+        print(f"Rebuild (one-off):           {rebuild_ms:10.2f} ms")
+        print(f"Naive GROUP BY aggregation:  {naive_ms:10.2f} ms")
+        print(f"Precomputed stats read:      {precomputed_ms:10.2f} ms")
+        print(f"Per-write aggregate update:  {delta_ms:10.3f} ms")
+        print(f"Read speedup:                {naive_ms / precomputed_ms:10.1f}x")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
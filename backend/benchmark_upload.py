@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for concurrent audio uploads to /api/triage/transcribe
+
+Starts the backend in a child process with the Groq STT call replaced by a
+stub that just drains the file, fires concurrent uploads at it and reports
+the server's peak RSS. Use --legacy to compare against the old
+read-into-BytesIO handler. Linux only (reads /proc for RSS).
+
+Usage:
+    python benchmark_upload.py --concurrency 8 --size-mb 25
+    python benchmark_upload.py --concurrency 8 --size-mb 25 --legacy
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+PORT = 8765
+
+
+def serve(legacy: bool):
+    """Child process: run the app with a stubbed STT backend"""
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ.setdefault("ELEVENLABS_API_KEY", "benchmark")
+    os.environ["DEBUG"] = "False"
+
+    import uvicorn
+    from io import BytesIO
+    from fastapi import UploadFile, File
+    from app.main import app
+    from app.services import groq_service
+
+    async def stub_transcribe(audio_file):
+        fileobj = audio_file[1] if isinstance(audio_file, tuple) else audio_file
+        while fileobj.read(1024 * 1024):
+            pass
+        return "stub transcription"
+
+    groq_service.transcribe_audio = stub_transcribe
+
+    if legacy:
+        @app.post("/bench/legacy-transcribe")
+        async def legacy_transcribe(audio_file: UploadFile = File(...)):
+            audio_data = await audio_file.read()
+            audio_buffer = BytesIO(audio_data)
+            audio_buffer.name = audio_file.filename or "audio.wav"
+            return {"transcription": await groq_service.transcribe_audio(audio_buffer)}
+
+    uvicorn.run(app, host="127.0.0.1", port=PORT, log_level="warning")
+
+
+def peak_rss_mb(pid: int) -> float:
+    """Peak resident set size of a process in MB"""
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def upload(session, url, payload):
+    form = aiohttp.FormData()
+    form.add_field("audio_file", payload, filename="bench.wav", content_type="audio/wav")
+    async with session.post(url, data=form) as response:
+        await response.read()
+        return response.status
+
+
+async def wait_ready():
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"http://127.0.0.1:{PORT}/health"):
+                    return
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Benchmark server did not start")
+
+
+async def drive(url, concurrency, payload):
+    async with aiohttp.ClientSession() as session:
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(upload(session, url, payload) for _ in range(concurrency)))
+        return statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=25)
+    parser.add_argument("--legacy", action="store_true")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.legacy)
+        return
+
+    child_args = [sys.executable, __file__, "--serve"] + (["--legacy"] if args.legacy else [])
+    server = subprocess.Popen(child_args, cwd=os.path.dirname(os.path.abspath(__file__)))
+    try:
+        asyncio.run(wait_ready())
+        baseline = peak_rss_mb(server.pid)
+        # Stay just under the limit so the upload is accepted
+        payload = os.urandom(int(args.size_mb * 1024 * 1024) - 4096)
+        path = "/bench/legacy-transcribe" if args.legacy else "/api/triage/transcribe"
+        statuses, elapsed = asyncio.run(
+            drive(f"http://127.0.0.1:{PORT}{path}", args.concurrency, payload)
+        )
+        peak = peak_rss_mb(server.pid)
+        print(f"Mode:              {'legacy' if args.legacy else 'streaming'}")
+        print(f"Uploads:           {args.concurrency} x {args.size_mb} MB, statuses {sorted(set(statuses))}")
+        print(f"Elapsed:           {elapsed:.2f}s")
+        print(f"Server peak RSS:   {peak:.1f} MB (startup {baseline:.1f} MB, +{peak - baseline:.1f} MB)")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Appointment write throughput: per-request commit vs group commit
+
+For each concurrency level, creates appointments against a fresh SQLite
+database file two ways:
+
+- direct: appointment_service.create_appointment from N threads, each
+  with its own session (one commit + refresh per booking)
+- group:  N asyncio tasks awaiting appointment_writer.create (shared
+  batched commits with INSERT ... RETURNING)
+
+and reports writes/sec and mean batch size as JSON.
+
+Usage:
+    python benchmark_writes.py
+    python benchmark_writes.py --writes 2000 --concurrency 1 8 32 128 --window-ms 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+
+def _booking(index: int) -> dict:
+    from app.models import AppointmentType
+    return {
+        "patient_name": f"Benchmark Patient {index}",
+        "patient_phone": f"555{index:07d}",
+        "patient_email": None,
+        "symptoms": "Routine check-up",
+        "appointment_type": AppointmentType.GENERAL,
+        "appointment_date": datetime(2030, 1, 1, 9) + timedelta(minutes=30 * index),
+        "doctor_name": None,
+        "department": "General Medicine"
+    }
+
+
+def run_direct(writes: int, concurrency: int) -> float:
+    from app.database import SessionLocal
+    from app.services import appointment_service
+
+    def worker(indexes):
+        db = SessionLocal()
+        try:
+            for index in indexes:
+                appointment_service.create_appointment(db, _booking(index))
+        finally:
+            db.close()
+
+    chunks = [range(start, writes, concurrency) for start in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, chunks))
+    return time.perf_counter() - started
+
+
+def run_group(writes: int, concurrency: int, offset: int) -> tuple[float, float]:
+    from app.services import appointment_writer
+
+    async def worker(indexes):
+        for index in indexes:
+            await appointment_writer.create(_booking(offset + index))
+
+    async def drive():
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(range(start, writes, concurrency)) for start in range(concurrency)))
+        return time.perf_counter() - started
+
+    batches_before = appointment_writer.batches
+    elapsed = asyncio.run(drive())
+    batches = appointment_writer.batches - batches_before
+    return elapsed, writes / batches if batches else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=1000, help="Bookings per run")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="haa_writes_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["DEBUG"] = "False"
+    os.environ["GROUP_COMMIT_WINDOW_MS"] = str(args.window_ms)
+    os.environ["GROUP_COMMIT_MAX_BATCH"] = str(args.max_batch)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    from app.database import init_db
+    from app.services import appointment_writer
+    init_db()
+
+    results = []
+    offset = 0
+    for concurrency in args.concurrency:
+        direct = run_direct(args.writes, concurrency)
+        offset += args.writes
+        group, batch_size = run_group(args.writes, concurrency, offset)
+        offset += args.writes
+        results.append({
+            "concurrency": concurrency,
+            "direct_writes_per_sec": round(args.writes / direct, 1),
+            "group_writes_per_sec": round(args.writes / group, 1),
+            "speedup": round(direct / group, 2),
+            "mean_batch_size": round(batch_size, 1)
+        })
+    appointment_writer.stop()
+
+    print(json.dumps({
+        "writes_per_run": args.writes,
+        "window_ms": args.window_ms,
+        "max_batch": args.max_batch,
+        "results": results
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
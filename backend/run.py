@@ -1,10 +1,23 @@
 """
 Run script for the Hospital Appointment Assistant backend
+
+    python run.py                              # development: one process, reload when DEBUG
+    python run.py --production [--workers N]   # multi-worker with graceful drain
 """
+import argparse
+import importlib.util
+import os
+import tempfile
+
 import uvicorn
 from app.config import settings
 
-if __name__ == "__main__":
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def run_development():
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
@@ -12,3 +25,65 @@ if __name__ == "__main__":
         reload=settings.DEBUG,
         log_level="info"
     )
+
+
+def run_production(workers: int):
+    """
+    Serve with several worker processes
+
+    The schema is created once here rather than by every worker, workers
+    share a Prometheus multiprocess directory and a job store, the change
+    feed goes through the database, and on SIGTERM all workers drain
+    in-flight requests and jobs for up to GRACEFUL_SHUTDOWN_SECONDS.
+    """
+    workers = workers or settings.WORKERS or os.cpu_count() or 1
+
+    # Must be set before any worker imports prometheus_client
+    if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="haa_metrics_")
+
+    from app.database import init_db
+    init_db()
+    os.environ["DB_AUTO_CREATE"] = "False"
+    if workers > 1:
+        os.environ["EVENT_SHARED_LOG"] = "True"
+        # Any worker may get the poll or cancel for a job another one accepted
+        if not settings.JOB_STORE_PATH:
+            os.environ["JOB_STORE_PATH"] = "./jobs.db"
+
+    from app.server import DrainingServer, DrainingMultiprocess
+
+    config = uvicorn.Config(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=workers,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        timeout_graceful_shutdown=int(settings.GRACEFUL_SHUTDOWN_SECONDS),
+        proxy_headers=True,
+        log_level="info"
+    )
+    server = DrainingServer(config=config)
+    if workers > 1:
+        sock = config.bind_socket()
+        DrainingMultiprocess(
+            config,
+            target=server.run,
+            sockets=[sock],
+            deadline_seconds=settings.GRACEFUL_SHUTDOWN_SECONDS + 5
+        ).run()
+    else:
+        server.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the backend server")
+    parser.add_argument("--production", action="store_true", help="Multi-worker mode without reload")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: WORKERS or CPU count)")
+    args = parser.parse_args()
+
+    if args.production:
+        run_production(args.workers)
+    else:
+        run_development()
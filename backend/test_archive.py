@@ -0,0 +1,116 @@
+"""
+Archival tests: archived appointment ids are never handed out again
+
+Run with: python -m pytest test_archive.py
+"""
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='haa_test_'), 'test.db')}"
+os.environ["DEBUG"] = "False"
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.database import Base, SessionLocal, engine, init_db
+from app.models import Appointment, AppointmentStatus, ArchivedAppointment
+from app.services import appointment_service, archive_service
+from app.services.archive_service import ArchiveService, _COLUMNS
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def add_finished(db, name: str) -> int:
+    appointment = Appointment(
+        patient_name=name,
+        patient_phone="5550000000",
+        appointment_date=datetime.utcnow() - timedelta(days=400),
+        status=AppointmentStatus.COMPLETED,
+        department="General Medicine"
+    )
+    db.add(appointment)
+    db.commit()
+    return appointment.id
+
+
+def copy_to_archive(db, appointment_id: int):
+    columns = ", ".join(_COLUMNS)
+    db.execute(text(
+        f"INSERT INTO appointments_archive ({columns}, archived_at) "
+        f"SELECT {columns}, CURRENT_TIMESTAMP FROM appointments WHERE id = :id"
+    ), {"id": appointment_id})
+    db.commit()
+
+
+def test_archive_create_archive(db):
+    first = add_finished(db, "First")
+    assert archive_service.archive(db, older_than_days=30, pause_seconds=0) == 1
+
+    second = add_finished(db, "Second")
+    assert second > first
+    assert appointment_service.get_appointment(db, first).patient_name == "First"
+    assert appointment_service.get_appointment(db, second).patient_name == "Second"
+
+    assert archive_service.archive(db, older_than_days=30, pause_seconds=0) == 1
+    assert db.query(Appointment).count() == 0
+    assert db.query(ArchivedAppointment).count() == 2
+    listed = appointment_service.get_appointments(db, include_archived=True)
+    assert sorted(appointment.id for appointment in listed) == [first, second]
+
+
+def test_conflict_with_same_row_removes_live_copy(db):
+    appointment_id = add_finished(db, "Copied")
+    copy_to_archive(db, appointment_id)
+
+    error = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+    assert ArchiveService._resolve_conflict(db, [appointment_id], error) == 1
+    assert db.query(Appointment).count() == 0
+    assert db.query(ArchivedAppointment).count() == 1
+
+
+def test_conflict_with_different_row_is_raised(db):
+    appointment_id = add_finished(db, "Live")
+    copy_to_archive(db, appointment_id)
+    db.execute(text("UPDATE appointments_archive SET patient_name = 'Other' WHERE id = :id"), {"id": appointment_id})
+    db.commit()
+
+    error = IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed"))
+    with pytest.raises(IntegrityError):
+        ArchiveService._resolve_conflict(db, [appointment_id], error)
+    assert db.query(Appointment).count() == 1
+    # The colliding row is left alone rather than blocking later batches
+    assert archive_service.archive(db, older_than_days=30, pause_seconds=0) == 0
+
+
+def test_legacy_table_gets_autoincrement(db):
+    first = add_finished(db, "First")
+    archive_service.archive(db, older_than_days=30, pause_seconds=0)
+    db.close()
+
+    # Recreate the live table as it was before AUTOINCREMENT
+    connection = sqlite3.connect(engine.url.database)
+    schema = connection.execute("SELECT sql FROM sqlite_master WHERE name = 'appointments'").fetchone()[0]
+    connection.execute("DROP TABLE appointments")
+    connection.execute(schema.replace("AUTOINCREMENT", ""))
+    connection.commit()
+    connection.close()
+    engine.dispose()
+
+    init_db()
+    session = SessionLocal()
+    try:
+        assert add_finished(session, "Second") > first
+    finally:
+        session.close()
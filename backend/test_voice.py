@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test script for the real-time voice session endpoint
+
+Start the backend with local stub backends first:
+    VOICE_BACKEND=stub python run.py
+"""
+import asyncio
+import json
+import math
+import struct
+
+import websockets
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = SAMPLE_RATE // 50  # 20ms
+
+
+def tone_frames(seconds, frequency=440, amplitude=12000):
+    """Generate 20ms frames of a sine wave (stands in for speech)"""
+    frames = []
+    total = int(SAMPLE_RATE * seconds)
+    for start in range(0, total, FRAME_SAMPLES):
+        samples = [
+            int(amplitude * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+            for i in range(start, min(start + FRAME_SAMPLES, total))
+        ]
+        frames.append(struct.pack('<' + 'h' * len(samples), *samples))
+    return frames
+
+
+def silence_frames(seconds):
+    """Generate 20ms frames of silence"""
+    return [bytes(FRAME_SAMPLES * 2)] * int(seconds * 50)
+
+
+async def send_audio(websocket, frames):
+    for frame in frames:
+        await websocket.send(frame)
+        await asyncio.sleep(0.02)
+
+
+async def print_events(websocket):
+    async for message in websocket:
+        if isinstance(message, bytes):
+            continue
+        event = json.loads(message)
+        print(f"  <- {event}")
+
+
+async def run_voice_session():
+    """Speak, then interrupt the reply to check barge-in"""
+    url = f"ws://localhost:8000/api/voice/session?sample_rate={SAMPLE_RATE}"
+    async with websockets.connect(url) as websocket:
+        receiver = asyncio.create_task(print_events(websocket))
+
+        print("Sending first utterance...")
+        await send_audio(websocket, tone_frames(1.0) + silence_frames(0.8))
+
+        print("Interrupting while the reply streams...")
+        await asyncio.sleep(0.15)
+        await send_audio(websocket, tone_frames(0.5) + silence_frames(0.8))
+
+        await asyncio.sleep(1.0)
+        await websocket.send(json.dumps({"type": "stop"}))
+        await asyncio.sleep(0.5)
+        receiver.cancel()
+
+
+if __name__ == "__main__":
+    print("Testing voice session endpoint...")
+    try:
+        asyncio.run(run_voice_session())
+        print("✅ Voice session finished")
+    except Exception as e:
+        print(f"❌ Error: {e}")
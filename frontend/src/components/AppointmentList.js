@@ -46,10 +46,12 @@ function AppointmentList() {
 
   useEffect(() => {
     fetchAppointments();
+    const unsubscribe = appointmentsAPI.subscribe(() => fetchAppointments(false));
+    return unsubscribe;
   }, []);
 
-  const fetchAppointments = async () => {
-    setLoading(true);
+  const fetchAppointments = async (showSpinner = true) => {
+    if (showSpinner) setLoading(true);
     setError('');
     try {
       const response = await appointmentsAPI.getAll();
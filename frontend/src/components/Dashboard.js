@@ -30,21 +30,23 @@ function Dashboard() {
 
   useEffect(() => {
     fetchStats();
+    const unsubscribe = appointmentsAPI.subscribe(() => fetchStats(false));
+    return unsubscribe;
   }, []);
 
-  const fetchStats = async () => {
-    setLoading(true);
+  const fetchStats = async (showSpinner = true) => {
+    if (showSpinner) setLoading(true);
     setError('');
     try {
-      const response = await appointmentsAPI.getAll();
-      const appointments = response.data;
+      const response = await appointmentsAPI.getStats();
+      const byStatus = response.data.by_status;
 
       const newStats = {
-        total: appointments.length,
-        pending: appointments.filter((a) => a.status === 'pending').length,
-        confirmed: appointments.filter((a) => a.status === 'confirmed').length,
-        completed: appointments.filter((a) => a.status === 'completed').length,
-        cancelled: appointments.filter((a) => a.status === 'cancelled').length,
+        total: response.data.total,
+        pending: byStatus.pending || 0,
+        confirmed: byStatus.confirmed || 0,
+        completed: byStatus.completed || 0,
+        cancelled: byStatus.cancelled || 0,
       };
 
       setStats(newStats);
@@ -17,6 +17,19 @@ export const appointmentsAPI = {
   update: (id, data) => api.put(`/api/appointments/${id}`, data),
   cancel: (id) => api.delete(`/api/appointments/${id}`),
   getAvailableSlots: (data) => api.post('/api/appointments/available-slots', data),
+  getStats: (params) => api.get('/api/appointments/stats', { params }),
+  bulkReschedule: (data) => api.post('/api/appointments/bulk-reschedule', data),
+  // Subscribe to the server-sent change feed; returns an unsubscribe function.
+  // EventSource reconnects on its own and resumes from the last event id.
+  subscribe: (onEvent) => {
+    const source = new EventSource(`${API_BASE_URL}/api/appointments/events`);
+    ['created', 'updated', 'cancelled', 'rescheduled', 'reset'].forEach((type) => {
+      source.addEventListener(type, (event) => {
+        onEvent(type, event.data ? JSON.parse(event.data) : {});
+      });
+    });
+    return () => source.close();
+  },
 };
 
 // LiveKit API
@@ -32,6 +45,7 @@ export const livekitAPI = {
 // Triage API
 export const triageAPI = {
   analyzeSymptoms: (data) => api.post('/api/triage/analyze', data),
+  triageAndBook: (data) => api.post('/api/triage/book', data),
   conversation: (data) => api.post('/api/triage/conversation', data),
   transcribe: (formData) => api.post('/api/triage/transcribe', formData, {
     headers: {